@@ -0,0 +1,197 @@
+import argparse
+import time
+import numpy as np
+import color_convert
+import lut
+import delta_e
+import palette
+
+# Scalar reference implementations, kept as they were written for
+# ColorConverterApp before the conversions moved to color_convert.
+
+def scalar_rgb_to_cmyk(rgb):
+    r, g, b = [x/255 for x in rgb]
+    k = 1 - max(r, g, b)
+    if k == 1:
+        return [0, 0, 0, 100]
+    c = (1-r-k)/(1-k) * 100
+    m = (1-g-k)/(1-k) * 100
+    y = (1-b-k)/(1-k) * 100
+
+    return [c, m, y, k*100]
+
+def scalar_cmyk_to_rgb(cmyk):
+    c, m, y, k = [x/100 for x in cmyk]
+    r = 255 * (1-c) * (1-k)
+    g = 255 * (1-m) * (1-k)
+    b = 255 * (1-y) * (1-k)
+
+    return [round(r), round(g), round(b)]
+
+def scalar_rgb_to_lab(rgb):
+    r, g, b = [x/255 for x in rgb]
+
+    def transform(x):
+        return x/12.92 if x <= 0.04045 else ((x + 0.055)/1.055) ** 2.4
+
+    r, g, b = transform(r), transform(g), transform(b)
+
+    x = 0.4124564 * r + 0.3575761 * g + 0.1804375 * b
+    y = 0.2126729 * r + 0.7151522 * g + 0.0721750 * b
+    z = 0.0193339 * r + 0.1191920 * g + 0.9503041 * b
+
+    xn, yn, zn = 0.95047, 1.00000, 1.08883
+
+    def f(t):
+        return t**(1/3) if t > 0.008856 else 7.787*t + 16/116
+
+    fx = f(x/xn)
+    fy = f(y/yn)
+    fz = f(z/zn)
+
+    L = max(0, min(100, 116 * fy - 16))
+    a = max(-128, min(127, 500 * (fx - fy)))
+    b = max(-128, min(127, 200 * (fy - fz)))
+
+    return [L, a, b]
+
+def scalar_lab_to_rgb(lab):
+    L, a, b = lab
+
+    fy = (L + 16) / 116
+    fx = a / 500 + fy
+    fz = fy - b / 200
+
+    def f_inv(t):
+        return t**3 if t > 0.206893 else (t - 16/116) / 7.787
+
+    xn, yn, zn = 0.95047, 1.00000, 1.08883
+    x = xn * f_inv(fx)
+    y = yn * f_inv(fy)
+    z = zn * f_inv(fz)
+
+    r = 3.2404542 * x - 1.5371385 * y - 0.4985314 * z
+    g = -0.9692660 * x + 1.8760108 * y + 0.0415560 * z
+    b = 0.0556434 * x - 0.2040259 * y + 1.0572252 * z
+
+    def transform(x):
+        return x * 12.92 if x <= 0.0031308 else 1.055 * x**(1/2.4) - 0.055
+
+    r, g, b = transform(r), transform(g), transform(b)
+
+    return [max(0, min(255, round(x * 255))) for x in [r, g, b]]
+
+
+def make_inputs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "rgb": rng.integers(0, 256, size=(count, 3)),
+        "cmyk": rng.uniform(0, 100, size=(count, 4)),
+        "lab": np.column_stack([rng.uniform(0, 100, count),
+                                rng.uniform(-128, 127, count),
+                                rng.uniform(-128, 127, count)]),
+    }
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(count, scalar_count):
+    inputs = make_inputs(count)
+    cases = [
+        ("rgb_to_cmyk", "rgb", scalar_rgb_to_cmyk, color_convert.rgb_to_cmyk),
+        ("cmyk_to_rgb", "cmyk", scalar_cmyk_to_rgb, color_convert.cmyk_to_rgb),
+        ("rgb_to_lab", "rgb", scalar_rgb_to_lab, color_convert.rgb_to_lab),
+        ("lab_to_rgb", "lab", scalar_lab_to_rgb, color_convert.lab_to_rgb),
+    ]
+
+    print(f"{'conversion':<14}{'scalar c/s':>14}{'vector c/s':>14}{'speedup':>10}{'max diff':>12}")
+    for name, source, scalar, vector in cases:
+        data = inputs[source]
+        sample = data[:scalar_count]
+
+        expected, scalar_time = timed(lambda: [scalar(row) for row in sample.tolist()])
+        result, vector_time = timed(vector, data)
+
+        scalar_rate = len(sample) / scalar_time
+        vector_rate = len(data) / vector_time
+        max_diff = np.max(np.abs(np.asarray(expected) - result[:scalar_count]))
+        print(f"{name:<14}{scalar_rate:>14,.0f}{vector_rate:>14,.0f}"
+              f"{vector_rate / scalar_rate:>9.1f}x{max_diff:>12.2e}")
+
+def run_lut(count):
+    rgb = make_inputs(count)["rgb"].astype(np.uint8)
+    print(f"{'table':<14}{'build s':>14}{'vector c/s':>14}{'lookup c/s':>14}{'max diff':>12}")
+    for table, vector in ((lut.RGB_TO_LAB, color_convert.rgb_to_lab),
+                          (lut.RGB_TO_CMYK, color_convert.rgb_to_cmyk)):
+        _, build_time = timed(table.load)
+        expected, vector_time = timed(vector, rgb)
+        result, lookup_time = timed(table.lookup, rgb)
+        max_diff = np.max(np.abs(expected - result))
+        print(f"{table.name:<14}{build_time:>14.2f}{count / vector_time:>14,.0f}"
+              f"{count / lookup_time:>14,.0f}{max_diff:>12.2e}")
+
+def brute_force_nearest(lab, palette_lab, chunk=1024):
+    index = np.empty(len(lab), dtype=np.intp)
+    for start in range(0, len(lab), chunk):
+        d = delta_e.cie76(lab[start:start + chunk, None, :], palette_lab[None, :, :])
+        index[start:start + chunk] = d.argmin(axis=1)
+    return index
+
+def run_palette(count, palette_size):
+    rng = np.random.default_rng(1)
+    index = palette.PaletteIndex(range(palette_size), rng.integers(0, 256, size=(palette_size, 3)))
+    rgb = make_inputs(count)["rgb"].astype(np.uint8)
+    lab = color_convert.rgb_to_lab(rgb)
+
+    expected, brute_time = timed(brute_force_nearest, lab, index.lab)
+    (result, _), cold_time = timed(index.nearest, lab)
+    _, warm_time = timed(index.nearest, lab)
+    print(f"palette of {palette_size} colors, {count:,} queries")
+    print(f"{'brute force':<14}{count / brute_time:>14,.0f} q/s")
+    print(f"{'grid (cold)':<14}{count / cold_time:>14,.0f} q/s")
+    print(f"{'grid (warm)':<14}{count / warm_time:>14,.0f} q/s")
+    print(f"{'mismatches':<14}{np.count_nonzero(expected != result):>14,}")
+
+def naive_pairwise(lab1, lab2, metric):
+    return [[metric(x, y) for y in lab2] for x in lab1]
+
+def run_delta_e(samples, targets, naive_rows=20):
+    inputs = make_inputs(max(samples, targets))
+    lab1 = inputs["lab"][:samples]
+    lab2 = inputs["lab"][::-1][:targets]
+    pairs = samples * targets
+
+    print(f"Delta E, {samples:,} x {targets:,} pairs")
+    print(f"{'metric':<14}{'naive p/s':>14}{'matrix p/s':>14}{'top-5 p/s':>14}{'max diff':>12}")
+    for name, metric in delta_e.METRICS.items():
+        naive_pairs = naive_rows * targets
+        expected, naive_time = timed(naive_pairwise, lab1[:naive_rows], lab2, metric)
+        matrix, matrix_time = timed(delta_e.pairwise, lab1, lab2, name)
+        _, top_time = timed(delta_e.top_k, lab1, lab2, 5, name)
+        max_diff = np.max(np.abs(np.asarray(expected) - matrix[:naive_rows]))
+        print(f"{name:<14}{naive_pairs / naive_time:>14,.0f}{pairs / matrix_time:>14,.0f}"
+              f"{pairs / top_time:>14,.0f}{max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Color conversion throughput benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000,
+                        help="colors converted by the vectorized functions")
+    parser.add_argument("--scalar-count", type=int, default=100_000,
+                        help="colors converted by the scalar reference loop")
+    parser.add_argument("--lut", action="store_true",
+                        help="also benchmark the 24-bit lookup tables (builds them on first run)")
+    parser.add_argument("--palette", type=int, default=0,
+                        help="also benchmark nearest-color search against a random palette of this size")
+    parser.add_argument("--delta-e", type=int, nargs=2, metavar=("SAMPLES", "TARGETS"),
+                        help="also benchmark pairwise Delta E between random Lab sets")
+    args = parser.parse_args()
+    run(args.count, min(args.scalar_count, args.count))
+    if args.lut:
+        run_lut(args.count)
+    if args.palette:
+        run_palette(args.count, args.palette)
+    if args.delta_e:
+        run_delta_e(*args.delta_e)
@@ -0,0 +1,224 @@
+import argparse
+import csv
+import itertools
+import json
+import sys
+import numpy as np
+import color_convert
+from palette import parse_hex
+
+# Headless, streaming front end for the lab1 conversions. Rows flow through
+# a chain of generators (read -> parse -> batch -> convert -> write), so
+# memory is bounded by the chunk size no matter how large the input is.
+
+FORMATS = ("hex", "rgb", "cmyk", "lab")
+DEFAULT_COLUMNS = {
+    "hex": ["hex"],
+    "rgb": ["r", "g", "b"],
+    "cmyk": ["c", "m", "y", "k"],
+    "lab": ["L", "a", "b"],
+}
+DEFAULT_CHUNK = 65536
+
+
+def detect_format(path):
+    if path and path.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def skip_row(errors, lineno, message):
+    # Raises for an invalid row, or tallies it in errors when given
+    if errors is None:
+        raise ValueError(f"line {lineno}: {message}")
+    errors["count"] += 1
+    errors["first"] = errors["first"] or lineno
+
+
+def read_records(stream, fmt, errors=None):
+    # Yields (line number, record): dicts for JSONL, lists for CSV
+    if fmt == "jsonl":
+        for lineno, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield lineno, json.loads(line)
+            except json.JSONDecodeError as e:
+                skip_row(errors, lineno, f"invalid JSON: {e.msg}")
+    else:
+        reader = csv.reader(stream)
+        for record in reader:
+            if record:
+                yield reader.line_num, record
+
+
+def parse_colors(records, space, columns, errors):
+    # Yields (record, color values). columns are dict keys or list indices.
+    # Rows that can't be parsed raise, or are tallied in errors when given.
+    expected = 3 if space == "hex" else len(DEFAULT_COLUMNS[space])
+    for lineno, record in records:
+        try:
+            fields = [record[column] for column in columns]
+            if space == "hex":
+                values = parse_hex(str(fields[0]))
+            else:
+                values = [float(field) for field in fields]
+            if len(values) != expected:
+                raise ValueError(f"expected {expected} values, got {len(values)}")
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            skip_row(errors, lineno, f"cannot parse color: {e}")
+            continue
+        yield record, values
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def convert_batches(batches, source, target, precision):
+    # One vectorized conversion per chunk
+    color_source = "rgb" if source == "hex" else source
+    color_target = "rgb" if target == "hex" else target
+    for batch in batches:
+        values = np.array([values for _, values in batch])
+        result = color_convert.convert(values, color_source, color_target)
+        if color_target == "rgb":
+            # RGB input passes through unconverted, so round and clip here too
+            result = np.clip(np.rint(result), 0, 255).astype(int)
+            if target == "hex":
+                result = [["#{:02x}{:02x}{:02x}".format(*row)] for row in result.tolist()]
+            else:
+                result = result.tolist()
+        else:
+            result = np.round(result, precision).tolist()
+        yield [(record, row) for (record, _), row in zip(batch, result)]
+
+
+class Writer:
+    def __init__(self, stream, fmt, columns, keep, header=None):
+        self.stream = stream
+        self.fmt = fmt
+        self.columns = columns
+        self.keep = keep
+        self.header = header
+        self.csv = csv.writer(stream) if fmt == "csv" else None
+        self.header_written = False
+
+    def write_csv(self, rows):
+        if not self.header_written:
+            header = list(self.columns)
+            if self.keep and rows:
+                record = rows[0][0]
+                if isinstance(record, dict):
+                    prefix = list(record)
+                else:
+                    prefix = self.header or [f"col{i}" for i in range(len(record))]
+                header = prefix + header
+            self.csv.writerow(header)
+            self.header_written = True
+
+        if not self.keep:
+            self.csv.writerows(row for _, row in rows)
+        else:
+            self.csv.writerows((list(record.values()) if isinstance(record, dict) else record) + row
+                               for record, row in rows)
+
+    def write_jsonl(self, rows):
+        for record, row in rows:
+            fields = dict(zip(self.columns, row))
+            if self.keep:
+                if not isinstance(record, dict):
+                    names = self.header or [f"col{i}" for i in range(len(record))]
+                    record = dict(zip(names, record))
+                fields = {**record, **fields}
+            self.stream.write(json.dumps(fields) + "\n")
+
+    def write(self, rows):
+        if self.fmt == "jsonl":
+            self.write_jsonl(rows)
+        else:
+            self.write_csv(rows)
+
+
+def run(source, target, input_stream, output_stream, input_format="csv", output_format=None,
+        columns=None, header=True, keep=False, chunk=DEFAULT_CHUNK, precision=4, skip_invalid=False):
+    columns = columns or DEFAULT_COLUMNS[source]
+    errors = {"count": 0, "first": None} if skip_invalid else None
+
+    records = read_records(input_stream, input_format, errors)
+    fieldnames = None
+    if input_format == "csv":
+        if header:
+            # Resolve column names to positions once instead of per row
+            first = next(records, None)
+            if first is None:
+                # Empty input has no header row and no colors, as for JSONL
+                return 0, errors
+            _, fieldnames = first
+            missing = [column for column in columns if column not in fieldnames]
+            if missing:
+                raise ValueError(f"missing input columns: {', '.join(missing)}")
+            columns = [fieldnames.index(column) for column in columns]
+        else:
+            columns = list(range(len(columns)))
+
+    colors = parse_colors(records, source, columns, errors)
+    converted = convert_batches(batched(colors, chunk), source, target, precision)
+
+    writer = Writer(output_stream, output_format or input_format, DEFAULT_COLUMNS[target],
+                    keep, fieldnames)
+    count = 0
+    for rows in converted:
+        writer.write(rows)
+        count += len(rows)
+    return count, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream colors from CSV/JSONL and convert them")
+    parser.add_argument("input", nargs="?", help="CSV or JSONL file (stdin by default)")
+    parser.add_argument("-o", "--output", help="output file (stdout by default)")
+    parser.add_argument("--from", dest="source", choices=FORMATS, required=True)
+    parser.add_argument("--to", dest="target", choices=FORMATS, required=True)
+    parser.add_argument("--input-format", choices=("csv", "jsonl"),
+                        help="detected from the file extension by default")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"),
+                        help="same as the input format by default")
+    parser.add_argument("--columns", help="comma-separated input column names")
+    parser.add_argument("--no-header", action="store_true",
+                        help="CSV input has no header; colors are the leading columns")
+    parser.add_argument("--keep", action="store_true", help="copy the input fields to the output")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="rows per vectorized batch")
+    parser.add_argument("--precision", type=int, default=4, help="decimals for CMYK/Lab output")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="skip unparseable rows instead of stopping")
+    args = parser.parse_args()
+
+    input_format = args.input_format or detect_format(args.input)
+    output_format = args.output_format or (detect_format(args.output) if args.output else input_format)
+    columns = args.columns.split(",") if args.columns else None
+
+    input_stream = open(args.input, newline="", encoding="utf-8") if args.input else sys.stdin
+    output_stream = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        count, errors = run(args.source, args.target, input_stream, output_stream,
+                            input_format, output_format, columns, not args.no_header,
+                            args.keep, args.chunk, args.precision, args.skip_invalid)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if args.input:
+            input_stream.close()
+        if args.output:
+            output_stream.close()
+
+    print(f"Converted {count} colors", file=sys.stderr)
+    if errors and errors["count"]:
+        print(f"Skipped {errors['count']} invalid rows (first at line {errors['first']})",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import numpy as np
+
+# All conversions work on arrays whose last axis holds the color components,
+# so a single color (shape (3,) / (4,)) and a batch (shape (N, 3) / (N, 4))
+# go through the same vectorized code path.
+
+# sRGB (D65) <-> CIE XYZ
+RGB_TO_XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                       [0.2126729, 0.7151522, 0.0721750],
+                       [0.0193339, 0.1191920, 0.9503041]])
+
+XYZ_TO_RGB = np.array([[3.2404542, -1.5371385, -0.4985314],
+                       [-0.9692660, 1.8760108, 0.0415560],
+                       [0.0556434, -0.2040259, 1.0572252]])
+
+# D65 reference white
+WHITE = np.array([0.95047, 1.00000, 1.08883])
+
+
+def rgb_to_cmyk(rgb):
+    rgb = np.asarray(rgb, dtype=np.float64) / 255
+    k = 1 - rgb.max(axis=-1, keepdims=True)
+    black = k == 1
+    cmy = (1 - rgb - k) / np.where(black, 1, 1 - k) * 100
+    cmy = np.where(black, 0, cmy)
+
+    return np.concatenate([cmy, k * 100], axis=-1)
+
+
+def cmyk_to_rgb(cmyk):
+    cmyk = np.asarray(cmyk, dtype=np.float64) / 100
+    rgb = 255 * (1 - cmyk[..., :3]) * (1 - cmyk[..., 3:])
+
+    return np.rint(rgb).astype(int)
+
+
+def srgb_to_linear(c):
+    # Guard the power branch so negative inputs don't produce NaN warnings
+    return np.where(c <= 0.04045, c / 12.92,
+                    ((np.maximum(c, 0.04045) + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(c):
+    return np.where(c <= 0.0031308, c * 12.92,
+                    1.055 * np.maximum(c, 0.0031308) ** (1 / 2.4) - 0.055)
+
+
+# Linear-light value of every 8-bit sRGB code, so integer input never pays
+# for the power function
+SRGB_TO_LINEAR_TABLE = srgb_to_linear(np.arange(256) / 255)
+
+
+def _f(t):
+    return np.where(t > 0.008856, np.cbrt(t), 7.787 * t + 16 / 116)
+
+
+def _f_inv(t):
+    return np.where(t > 0.206893, t ** 3, (t - 16 / 116) / 7.787)
+
+
+def linear_rgb_to_lab(linear):
+    xyz = linear @ RGB_TO_XYZ.T / WHITE
+    f = _f(xyz)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+
+    L = np.clip(116 * fy - 16, 0, 100)
+    a = np.clip(500 * (fx - fy), -128, 127)
+    b = np.clip(200 * (fy - fz), -128, 127)
+
+    return np.stack([L, a, b], axis=-1)
+
+
+def rgb_to_linear(rgb):
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8 or (np.issubdtype(rgb.dtype, np.integer) and rgb.size
+                                 and rgb.min() >= 0 and rgb.max() <= 255):
+        return SRGB_TO_LINEAR_TABLE[rgb]
+    return srgb_to_linear(rgb.astype(np.float64) / 255)
+
+
+def rgb_to_lab(rgb):
+    return linear_rgb_to_lab(rgb_to_linear(rgb))
+
+
+def lab_to_linear_rgb(lab):
+    lab = np.asarray(lab, dtype=np.float64)
+
+    # Lab to XYZ
+    fy = (lab[..., 0] + 16) / 116
+    fx = lab[..., 1] / 500 + fy
+    fz = fy - lab[..., 2] / 200
+    xyz = _f_inv(np.stack([fx, fy, fz], axis=-1)) * WHITE
+
+    # XYZ to linear RGB (unclamped, may leave [0, 1] for out-of-gamut colors)
+    return xyz @ XYZ_TO_RGB.T
+
+
+def lab_to_rgb(lab):
+    rgb = linear_to_srgb(lab_to_linear_rgb(lab))
+    return np.clip(np.rint(rgb * 255), 0, 255).astype(int)
+
+
+SPACES = ("rgb", "cmyk", "lab")
+
+
+def to_rgb(values, space):
+    if space == "rgb":
+        return values
+    if space == "lab":
+        return lab_to_rgb(values)
+    return np.clip(cmyk_to_rgb(values), 0, 255)
+
+
+def convert(values, source, target):
+    # Any-to-any conversion through 8-bit RGB, as the converter app does
+    if source == target:
+        return values
+    rgb = to_rgb(values, source)
+    if target == "lab":
+        return rgb_to_lab(rgb)
+    if target == "cmyk":
+        return rgb_to_cmyk(rgb)
+    return rgb
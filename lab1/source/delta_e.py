@@ -0,0 +1,165 @@
+import numpy as np
+
+# Color differences between Lab arrays. Inputs broadcast against each other
+# along the leading axes; the last axis holds L, a, b.
+
+_POW25_7 = 25.0 ** 7
+
+# Pairwise computations are split into blocks of at most this many pairs,
+# which keeps the temporaries of CIEDE2000 to a few hundred MB at most
+BLOCK_PAIRS = 1 << 20
+
+# CIE94 application constants: (kL, K1, K2)
+CIE94_GRAPHIC_ARTS = (1, 0.045, 0.015)
+CIE94_TEXTILES = (2, 0.048, 0.014)
+
+
+def _split(lab):
+    lab = np.asarray(lab, dtype=np.float64)
+    return lab[..., 0], lab[..., 1], lab[..., 2]
+
+
+def cie76(lab1, lab2):
+    diff = np.asarray(lab1, dtype=np.float64) - np.asarray(lab2, dtype=np.float64)
+    return np.sqrt(np.sum(diff * diff, axis=-1))
+
+
+def cie94(lab1, lab2, application=CIE94_GRAPHIC_ARTS):
+    # Not symmetric: lab1 is the reference color
+    kL, K1, K2 = application
+    L1, a1, b1 = _split(lab1)
+    L2, a2, b2 = _split(lab2)
+
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
+    dL = L1 - L2
+    dC = C1 - C2
+    dH2 = np.maximum((a1 - a2) ** 2 + (b1 - b2) ** 2 - dC ** 2, 0)
+
+    Sc = 1 + K1 * C1
+    Sh = 1 + K2 * C1
+    return np.sqrt((dL / kL) ** 2 + (dC / Sc) ** 2 + dH2 / Sh ** 2)
+
+
+def ciede2000(lab1, lab2, kL=1, kC=1, kH=1):
+    L1, a1, b1 = _split(lab1)
+    L2, a2, b2 = _split(lab2)
+
+    # Chroma-dependent a* rescaling
+    C_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    C_bar7 = C_bar ** 7
+    G = 0.5 * (1 - np.sqrt(C_bar7 / (C_bar7 + _POW25_7)))
+    a1p = (1 + G) * a1
+    a2p = (1 + G) * a2
+
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    achromatic = C1p * C2p == 0
+
+    # Differences
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(achromatic, 0, dhp)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp / 2))
+
+    # Means
+    Lbp = (L1 + L2) / 2
+    Cbp = (C1p + C2p) / 2
+    hsum = h1p + h2p
+    hbp = np.where(np.abs(h1p - h2p) <= 180, hsum / 2,
+                   np.where(hsum < 360, (hsum + 360) / 2, (hsum - 360) / 2))
+    hbp = np.where(achromatic, hsum, hbp)
+
+    # Weighting functions
+    T = (1 - 0.17 * np.cos(np.radians(hbp - 30))
+         + 0.24 * np.cos(np.radians(2 * hbp))
+         + 0.32 * np.cos(np.radians(3 * hbp + 6))
+         - 0.20 * np.cos(np.radians(4 * hbp - 63)))
+    d_theta = 30 * np.exp(-((hbp - 275) / 25) ** 2)
+    Cbp7 = Cbp ** 7
+    Rc = 2 * np.sqrt(Cbp7 / (Cbp7 + _POW25_7))
+    Sl = 1 + 0.015 * (Lbp - 50) ** 2 / np.sqrt(20 + (Lbp - 50) ** 2)
+    Sc = 1 + 0.045 * Cbp
+    Sh = 1 + 0.015 * Cbp * T
+    Rt = -np.sin(np.radians(2 * d_theta)) * Rc
+
+    dL = dLp / (kL * Sl)
+    dC = dCp / (kC * Sc)
+    dH = dHp / (kH * Sh)
+    return np.sqrt(dL ** 2 + dC ** 2 + dH ** 2 + Rt * dC * dH)
+
+
+METRICS = {
+    "cie76": cie76,
+    "cie94": cie94,
+    "cie2000": ciede2000,
+}
+
+
+def get_metric(name):
+    try:
+        return METRICS[name]
+    except KeyError:
+        raise ValueError(f"Unknown Delta E metric: {name}") from None
+
+
+def _block_shape(rows, cols, block_pairs):
+    # Steps of at least 1, so empty inputs give empty results
+    block_cols = max(1, min(cols, block_pairs))
+    block_rows = max(1, min(rows, block_pairs // block_cols))
+    return block_rows, block_cols
+
+
+def iter_pairwise(lab1, lab2, metric="cie76", block_pairs=BLOCK_PAIRS):
+    # Yields (row, col, block) where block holds the differences between
+    # lab1[row:row + n] and lab2[col:col + m]; the full matrix is never built
+    distance = get_metric(metric)
+    lab1 = np.asarray(lab1, dtype=np.float64).reshape(-1, 3)
+    lab2 = np.asarray(lab2, dtype=np.float64).reshape(-1, 3)
+    block_rows, block_cols = _block_shape(len(lab1), len(lab2), block_pairs)
+
+    for row in range(0, len(lab1), block_rows):
+        left = lab1[row:row + block_rows, None, :]
+        for col in range(0, len(lab2), block_cols):
+            yield row, col, distance(left, lab2[None, col:col + block_cols, :])
+
+
+def pairwise(lab1, lab2, metric="cie76", out=None, block_pairs=BLOCK_PAIRS):
+    # Full N x M matrix. Pass a np.memmap (or np.lib.format.open_memmap) as
+    # out to stream the result to disk for matrices that don't fit in RAM.
+    shape = (len(np.asarray(lab1).reshape(-1, 3)), len(np.asarray(lab2).reshape(-1, 3)))
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f"Output shape {out.shape} does not match {shape}")
+
+    for row, col, block in iter_pairwise(lab1, lab2, metric, block_pairs):
+        out[row:row + block.shape[0], col:col + block.shape[1]] = block
+    return out
+
+
+def top_k(lab1, lab2, k=1, metric="cie76", block_pairs=BLOCK_PAIRS):
+    # Indices into lab2 and distances of the k nearest colors for every row
+    # of lab1, sorted by distance. Blocks are merged into a running best-k.
+    lab1 = np.asarray(lab1, dtype=np.float64).reshape(-1, 3)
+    lab2 = np.asarray(lab2, dtype=np.float64).reshape(-1, 3)
+    k = min(k, len(lab2))
+    best_dist = np.full((len(lab1), k), np.inf)
+    best_index = np.zeros((len(lab1), k), dtype=np.intp)
+
+    for row, col, block in iter_pairwise(lab1, lab2, metric, block_pairs):
+        rows = slice(row, row + block.shape[0])
+        dist = np.concatenate([best_dist[rows], block], axis=1)
+        index = np.concatenate([best_index[rows],
+                                np.broadcast_to(np.arange(col, col + block.shape[1]), block.shape)],
+                               axis=1)
+        keep = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        best_dist[rows] = np.take_along_axis(dist, keep, axis=1)
+        best_index[rows] = np.take_along_axis(index, keep, axis=1)
+
+    order = np.argsort(best_dist, axis=1)
+    return np.take_along_axis(best_index, order, axis=1), np.take_along_axis(best_dist, order, axis=1)
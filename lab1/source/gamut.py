@@ -0,0 +1,66 @@
+import numpy as np
+import color_convert
+
+# A Lab color is outside sRGB when one of its linear RGB components falls
+# outside the range that still rounds to a valid 8-bit code. The bounds are
+# half a code below 0 and above 255, expressed in linear light, so the test
+# runs on lab_to_linear_rgb output before any encoding or clamping.
+LOWER = color_convert.srgb_to_linear(-0.5 / 255)
+UPPER = color_convert.srgb_to_linear(255.5 / 255)
+
+MODES = ("clip", "chroma")
+BISECTION_STEPS = 24
+
+
+def out_of_gamut_linear(linear):
+    return np.any((linear < LOWER) | (linear > UPPER), axis=-1)
+
+
+def out_of_gamut(lab):
+    return out_of_gamut_linear(color_convert.lab_to_linear_rgb(lab))
+
+
+def in_gamut(lab):
+    return ~out_of_gamut(lab)
+
+
+def clip_to_gamut(lab):
+    linear = np.clip(color_convert.lab_to_linear_rgb(lab), 0, 1)
+    return color_convert.linear_rgb_to_lab(linear)
+
+
+def reduce_chroma(lab):
+    # Scale a and b towards the neutral axis, keeping L and hue. Each color
+    # is bisected on its own chroma scale; only out-of-gamut rows are touched.
+    lab = np.array(lab, dtype=np.float64)
+    lab[..., 0] = np.clip(lab[..., 0], 0, 100)
+    outside = out_of_gamut(lab)
+    if not np.any(outside):
+        return lab
+
+    target = lab[outside]
+    low = np.zeros(len(target))
+    high = np.ones(len(target))
+    for _ in range(BISECTION_STEPS):
+        mid = (low + high) / 2
+        candidate = np.column_stack([target[:, 0], target[:, 1:] * mid[:, None]])
+        fits = ~out_of_gamut(candidate)
+        low = np.where(fits, mid, low)
+        high = np.where(fits, high, mid)
+
+    target[:, 1:] *= low[:, None]
+    lab[outside] = target
+    return lab
+
+
+def gamut_map(lab, mode="chroma"):
+    # Returns the mapped Lab values and the mask of colors that needed it
+    lab = np.asarray(lab, dtype=np.float64)
+    outside = out_of_gamut(lab)
+    if mode == "clip":
+        mapped = np.where(outside[..., None], clip_to_gamut(lab), lab)
+    elif mode == "chroma":
+        mapped = reduce_chroma(lab)
+    else:
+        raise ValueError(f"Unknown gamut mapping mode: {mode}")
+    return mapped, outside
@@ -0,0 +1,175 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+import color_convert
+
+# Whole-image color space conversion. The source pixels are exposed as a
+# memory-mapped .npy file, the result is written into another memory-mapped
+# .npy file, and fixed-size tiles are converted by a process pool, so peak
+# memory per worker is bounded by the tile size rather than the image size.
+
+# Large scans easily exceed Pillow's decompression bomb limit
+Image.MAX_IMAGE_PIXELS = None
+
+CHANNELS = {"rgb": 3, "lab": 3, "cmyk": 4}
+PIL_MODES = {"rgb": "RGB", "lab": "LAB", "cmyk": "CMYK"}
+TIFF_EXTENSIONS = (".tif", ".tiff")
+STAGE_ROWS = 256
+
+
+def decode_8bit(values, space):
+    # Pillow keeps LAB a/b offset by 128 and both LAB L and CMYK in 0-255
+    if space == "lab":
+        values = values.astype(np.float64)
+        values[..., 0] *= 100 / 255
+        values[..., 1:] -= 128
+        return values
+    if space == "cmyk":
+        return values * (100 / 255)
+    return values
+
+
+def encode_8bit(values, space):
+    if space == "lab":
+        values = np.array(values, dtype=np.float64)
+        values[..., 0] *= 255 / 100
+        values[..., 1:] += 128
+    elif space == "cmyk":
+        values = values * (255 / 100)
+    return np.clip(np.rint(values), 0, 255).astype(np.uint8)
+
+
+def tile_boxes(height, width, tile_size):
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            yield y, min(y + tile_size, height), x, min(x + tile_size, width)
+
+
+# Per-process state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(source_path, output_path, source, target, encoded_input, encoded_output):
+    _worker["source"] = np.load(source_path, mmap_mode="r")
+    _worker["output"] = np.load(output_path, mmap_mode="r+")
+    _worker["spaces"] = (source, target)
+    _worker["encoded"] = (encoded_input, encoded_output)
+
+
+def _convert_tile(box):
+    y0, y1, x0, x1 = box
+    source, target = _worker["spaces"]
+    encoded_input, encoded_output = _worker["encoded"]
+
+    values = np.asarray(_worker["source"][y0:y1, x0:x1])
+    if encoded_input:
+        values = decode_8bit(values, source)
+    result = color_convert.convert(values, source, target)
+    if encoded_output:
+        result = encode_8bit(result, target)
+    _worker["output"][y0:y1, x0:x1] = result
+    return (y1 - y0) * (x1 - x0)
+
+
+def stage_image(image, path):
+    # Copy the decoded image into a .npy file strip by strip so workers can
+    # slice tiles out of it without the parent pickling pixel data
+    width, height = image.size
+    staged = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8,
+                                       shape=(height, width, len(image.getbands())))
+    for y in range(0, height, STAGE_ROWS):
+        strip = image.crop((0, y, width, min(y + STAGE_ROWS, height)))
+        staged[y:y + strip.height] = np.asarray(strip).reshape(strip.height, width, -1)
+    staged.flush()
+    return path
+
+
+def open_source(input_path, source, workdir):
+    # Returns (npy path, color space, whether values are 8-bit encoded)
+    if input_path.lower().endswith(".npy"):
+        array = np.load(input_path, mmap_mode="r")
+        if source is None:
+            if array.shape[-1] == 4:
+                source = "cmyk"
+            else:
+                source = "rgb" if array.dtype == np.uint8 else "lab"
+        return input_path, source, False
+
+    image = Image.open(input_path)
+    if source is None:
+        source = {"LAB": "lab", "CMYK": "cmyk"}.get(image.mode, "rgb")
+    if image.mode != PIL_MODES[source]:
+        image = image.convert(PIL_MODES[source])
+    path = stage_image(image, os.path.join(workdir, "source.npy"))
+    image.close()
+    return path, source, source != "rgb"
+
+
+def convert_image(input_path, output_path, target, source=None, tile_size=1024, workers=None):
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        source_path, source, encoded_input = open_source(input_path, source, workdir)
+        height, width = np.load(source_path, mmap_mode="r").shape[:2]
+
+        write_tiff = output_path.lower().endswith(TIFF_EXTENSIONS)
+        encoded_output = write_tiff and target != "rgb"
+        if write_tiff or target == "rgb":
+            dtype = np.uint8
+        else:
+            dtype = np.float32
+        npy_path = os.path.join(workdir, "output.npy") if write_tiff else output_path
+        output = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype,
+                                           shape=(height, width, CHANNELS[target]))
+        del output
+
+        convert_start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(source_path, npy_path, source, target,
+                                           encoded_input, encoded_output)) as pool:
+            pixels = sum(pool.map(_convert_tile, tile_boxes(height, width, tile_size)))
+        convert_time = time.perf_counter() - convert_start
+
+        if write_tiff:
+            result = np.load(npy_path, mmap_mode="r")
+            Image.fromarray(np.asarray(result), PIL_MODES[target]).save(output_path)
+            del result
+
+    total_time = time.perf_counter() - start
+    return {
+        "width": width,
+        "height": height,
+        "source": source,
+        "target": target,
+        "megapixels": pixels / 1e6,
+        "convert_seconds": convert_time,
+        "total_seconds": total_time,
+        "convert_mp_per_second": pixels / 1e6 / convert_time,
+        "total_mp_per_second": pixels / 1e6 / total_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a whole image between RGB, Lab and CMYK")
+    parser.add_argument("input", help="image readable by Pillow, or a .npy array")
+    parser.add_argument("output", help="output .npy or .tif file")
+    parser.add_argument("--to", dest="target", choices=sorted(CHANNELS), required=True)
+    parser.add_argument("--from", dest="source", choices=sorted(CHANNELS),
+                        help="source color space (detected from the input by default)")
+    parser.add_argument("--tile", type=int, default=1024, help="tile edge in pixels")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    stats = convert_image(args.input, args.output, args.target, args.source,
+                          args.tile, args.workers)
+    print(f"{stats['source']} -> {stats['target']}: {stats['width']}x{stats['height']} "
+          f"({stats['megapixels']:.1f} MP)")
+    print(f"conversion: {stats['convert_seconds']:.2f} s, {stats['convert_mp_per_second']:.2f} MP/s")
+    print(f"total:      {stats['total_seconds']:.2f} s, {stats['total_mp_per_second']:.2f} MP/s")
+
+
+if __name__ == "__main__":
+    main()
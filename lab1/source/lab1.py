@@ -1,8 +1,64 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import colorsys
 import numpy as np
 from functools import partial
+from collections import Counter
+import time
+import color_convert
+import gamut
+import palette
+
+class UpdateScheduler:
+    # Coalesces bursts of update requests (e.g. slider drags) into at most
+    # one callback per frame; only the most recent request is kept
+    def __init__(self, root, callback, interval=16):
+        self.root = root
+        self.callback = callback
+        self.interval = interval
+        self.pending = None
+        self.after_id = None
+        self.last_run = 0.0
+        self.requested = 0
+        self.performed = 0
+        self.cancelled = 0
+
+    def request(self, *args):
+        self.requested += 1
+        self.pending = args
+        if self.after_id is None:
+            elapsed = (time.perf_counter() - self.last_run) * 1000
+            delay = int(self.interval - elapsed)
+            if delay > 0:
+                self.after_id = self.root.after(delay, self.flush)
+            else:
+                self.after_id = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self._cancel_timer()
+        if self.pending is not None:
+            args, self.pending = self.pending, None
+            self.last_run = time.perf_counter()
+            self.performed += 1
+            self.callback(*args)
+
+    def cancel(self):
+        # Drops the pending request without running it
+        if self.pending is not None:
+            self.pending = None
+            self.cancelled += 1
+        self._cancel_timer()
+
+    def _cancel_timer(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    @property
+    def coalesced(self):
+        # Requests superseded by a later one before they ran
+        return self.requested - self.performed - self.cancelled - (self.pending is not None)
+
 
 class ColorConverterApp:
     def __init__(self, root):
@@ -12,6 +68,13 @@ class ColorConverterApp:
         
         # Flag to prevent recursive updates
         self.updating = False
+
+        # Slider drags are coalesced to one recompute per frame
+        self.scheduler = UpdateScheduler(root, self.apply_model)
+        self.stats = Counter()
+        self.control_values = {}
+        self.display_color = None
+        self.palette_index = None
         
         # Main frame
         main_frame = ttk.Frame(root, padding="10")
@@ -20,6 +83,7 @@ class ColorConverterApp:
         # Color display
         self.color_display = tk.Canvas(main_frame, width=200, height=200)
         self.color_display.grid(row=0, column=0, columnspan=3, pady=10)
+        self.color_rect = self.color_display.create_rectangle(0, 0, 200, 200, outline="")
         
         # Create frames for each color model
         self.rgb_frame = self.create_model_frame(main_frame, "RGB", 1, 
@@ -87,164 +151,134 @@ class ColorConverterApp:
                           command=lambda c=color: self.on_palette_click(c))
             btn.grid(row=0, column=i, padx=2)
 
-    def rgb_to_cmyk(self, rgb):
-        r, g, b = [x/255 for x in rgb]
-        k = 1 - max(r, g, b)
-        if k == 1:
-            return [0, 0, 0, 100]
-        c = (1-r-k)/(1-k) * 100
-        m = (1-g-k)/(1-k) * 100
-        y = (1-b-k)/(1-k) * 100
-
-        return [c, m, y, k*100]
-
-    def cmyk_to_rgb(self, cmyk):
-        c, m, y, k = [x/100 for x in cmyk]
-        r = 255 * (1-c) * (1-k)
-        g = 255 * (1-m) * (1-k)
-        b = 255 * (1-y) * (1-k)
-
-        return [round(r), round(g), round(b)]
-
-    def rgb_to_lab(self, rgb):
-        # RGB to XYZ
-        r, g, b = [x/255 for x in rgb]
-        
-        def transform(x):
-            return x/12.92 if x <= 0.04045 else ((x + 0.055)/1.055) ** 2.4
-        
-        r, g, b = transform(r), transform(g), transform(b)
-        
-        x = 0.4124564 * r + 0.3575761 * g + 0.1804375 * b
-        y = 0.2126729 * r + 0.7151522 * g + 0.0721750 * b
-        z = 0.0193339 * r + 0.1191920 * g + 0.9503041 * b
-        
-        # XYZ to Lab
-        xn, yn, zn = 0.95047, 1.00000, 1.08883
-        
-        def f(t):
-            return t**(1/3) if t > 0.008856 else 7.787*t + 16/116
-        
-        fx = f(x/xn)
-        fy = f(y/yn)
-        fz = f(z/zn)
-        
-        L = max(0, min(100, 116 * fy - 16))
-        a = max(-128, min(127, 500 * (fx - fy)))
-        b = max(-128, min(127, 200 * (fy - fz)))
-        
-        self.warning_label.config(text="")
+        # Custom palette matched in Lab space
+        ttk.Button(palette_frame, text="Load Palette...",
+                   command=self.load_palette).grid(row=0, column=len(colors), padx=5)
+        self.match_label = ttk.Label(palette_frame, text="")
+        self.match_label.grid(row=1, column=0, columnspan=len(colors) + 1)
 
-        return [L, a, b]
+    def load_palette(self):
+        filetypes = (
+            ("Palette files", "*.json *.csv *.txt"),
+            ("All files", "*.*")
+        )
+        path = filedialog.askopenfilename(filetypes=filetypes)
+        if path:
+            try:
+                self.palette_index = palette.load_index(path)
+            except (OSError, ValueError, KeyError) as e:
+                messagebox.showerror("Error", f"Error loading palette: {str(e)}")
+                return
+            self.display_color = None
+            self.update_display([self.rgb_frame[i][0].get() for i in range(3)])
 
-    def lab_to_rgb(self, lab):
-        L, a, b = lab
-        
-        # Lab to XYZ
-        fy = (L + 16) / 116
-        fx = a / 500 + fy
-        fz = fy - b / 200
-        
-        def f_inv(t):
-            return t**3 if t > 0.206893 else (t - 16/116) / 7.787
-        
-        xn, yn, zn = 0.95047, 1.00000, 1.08883
-        x = xn * f_inv(fx)
-        y = yn * f_inv(fy)
-        z = zn * f_inv(fz)
-        
-        # XYZ to RGB
-        r = 3.2404542 * x - 1.5371385 * y - 0.4985314 * z
-        g = -0.9692660 * x + 1.8760108 * y + 0.0415560 * z
-        b = 0.0556434 * x - 0.2040259 * y + 1.0572252 * z
-        
-        def transform(x):
-            return x * 12.92 if x <= 0.0031308 else 1.055 * x**(1/2.4) - 0.055
-        
-        r, g, b = transform(r), transform(g), transform(b)
-        
-        # Clamp values
-        rgb = [max(0, min(255, round(x * 255))) for x in [r, g, b]]
-        
-        # Check if conversion was approximate
-        original_lab = self.rgb_to_lab(rgb)
-        if any(abs(x - y) > 1 for x, y in zip(lab, original_lab)):
-            self.warning_label.config(text="Note: Some color values are approximate due to conversion limitations")
-        else:
-            self.warning_label.config(text="")
-            
-        return rgb
+    def update_match(self, rgb):
+        index, distance = self.palette_index.nearest_rgb(np.array(rgb, dtype=np.uint8))
+        name = self.palette_index.names[index]
+        self.match_label.config(text=f"Nearest palette color: {name} (\u0394E {distance:.2f})")
 
     def update_display(self, rgb):
         rounded_rgb = [round(x) for x in rgb]
         hex_color = "#{:02x}{:02x}{:02x}".format(*rounded_rgb)
-        self.color_display.delete("all")
-        self.color_display.create_rectangle(0, 0, 200, 200, fill=hex_color, outline="")
+        if hex_color != self.display_color:
+            self.color_display.itemconfig(self.color_rect, fill=hex_color)
+            self.display_color = hex_color
+            self.stats["display_updates"] += 1
+            if self.palette_index is not None:
+                self.update_match(rounded_rgb)
+
+    def set_control(self, model, controls, values):
+        # Only touch Tk variables whose value actually changed
+        for i, value in enumerate(values):
+            if self.control_values.get((model, i)) != value:
+                controls[i][0].set(value)
+                self.control_values[(model, i)] = value
+                self.stats["variable_sets"] += 1
 
     def update_controls(self, rgb, cmyk, lab):
         if not self.updating:
             self.updating = True
             
             # Update RGB controls
-            for i, value in enumerate(rgb):
-                self.rgb_frame[i][0].set(value)
+            self.set_control("RGB", self.rgb_frame, rgb)
             
             # Update CMYK controls
-            for i, value in enumerate(cmyk):
-                self.cmyk_frame[i][0].set(value)
+            self.set_control("CMYK", self.cmyk_frame, cmyk)
             
             # Update LAB controls
-            for i, value in enumerate(lab):
-                self.lab_frame[i][0].set(value)
+            self.set_control("LAB", self.lab_frame, lab)
                 
             self.updating = False
 
     def update_from_rgb(self, rgb):
-        cmyk = self.rgb_to_cmyk(rgb)
-        lab = self.rgb_to_lab(rgb)
+        cmyk = color_convert.rgb_to_cmyk(rgb).tolist()
+        lab = color_convert.rgb_to_lab(rgb).tolist()
+        self.warning_label.config(text="")
         self.update_controls(rgb, cmyk, lab)
         self.update_display(rgb)
 
     def update_from_cmyk(self, cmyk):
-        rgb = self.cmyk_to_rgb(cmyk)
-        lab = self.rgb_to_lab(rgb)
+        rgb = color_convert.cmyk_to_rgb(cmyk).tolist()
+        lab = color_convert.rgb_to_lab(rgb).tolist()
+        self.warning_label.config(text="")
         self.update_controls(rgb, cmyk, lab)
         self.update_display(rgb)
 
     def update_from_lab(self, lab):
-        rgb = self.lab_to_rgb(lab)
-        cmyk = self.rgb_to_cmyk(rgb)
+        rgb = color_convert.lab_to_rgb(lab)
+        cmyk = color_convert.rgb_to_cmyk(rgb).tolist()
+
+        # Check if conversion was approximate
+        if gamut.out_of_gamut(lab):
+            self.warning_label.config(text="Note: Some color values are approximate due to conversion limitations")
+        else:
+            self.warning_label.config(text="")
+
+        rgb = rgb.tolist()
         self.update_controls(rgb, cmyk, lab)
         self.update_display(rgb)
 
-    def on_spinbox_change(self, model, index):
-        if self.updating:
-            return
-            
+    def apply_model(self, model):
+        self.stats["recomputes"] += 1
         if model == "RGB":
             values = [self.rgb_frame[i][0].get() for i in range(3)]
-            self.update_from_rgb(values)
         elif model == "CMYK":
             values = [self.cmyk_frame[i][0].get() for i in range(4)]
-            self.update_from_cmyk(values)
         else:  # LAB
             values = [self.lab_frame[i][0].get() for i in range(3)]
-            self.update_from_lab(values)
 
-    def on_slider_change(self, model, index):
-        if self.updating:
-            return
-            
+        # The edited model's variables already hold these values
+        for i, value in enumerate(values):
+            self.control_values[(model, i)] = value
+
         if model == "RGB":
-            values = [self.rgb_frame[i][0].get() for i in range(3)]
             self.update_from_rgb(values)
         elif model == "CMYK":
-            values = [self.cmyk_frame[i][0].get() for i in range(4)]
             self.update_from_cmyk(values)
-        else:  # LAB
-            values = [self.lab_frame[i][0].get() for i in range(3)]
+        else:
             self.update_from_lab(values)
 
+    def on_spinbox_change(self, model, index):
+        if self.updating:
+            return
+
+        # Typed values are applied right away, superseding any pending drag
+        self.scheduler.cancel()
+        self.apply_model(model)
+
+    def on_slider_change(self, model, index):
+        if self.updating:
+            return
+
+        self.scheduler.request(model)
+
+    def update_stats(self):
+        return {
+            "slider_events": self.scheduler.requested,
+            "coalesced": self.scheduler.coalesced,
+            **self.stats,
+        }
+
     def on_palette_click(self, color):
         # Convert color name to RGB
         self.root.update()
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import numpy as np
+import color_convert
+
+# Full 24-bit lookup tables: one row per packed 0xRRGGBB value. Tables are
+# built lazily on first use, persisted as .npy files and memory-mapped, so a
+# conversion is a single indexed gather and only the touched pages are read.
+
+TABLE_SIZE = 1 << 24
+BUILD_BLOCK = 1 << 20
+
+DEFAULT_DIRECTORY = os.environ.get(
+    "LAB1_LUT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "lab1_lut"))
+
+
+def _formula_key():
+    # Tables are tied to the conversion constants; changing any of them
+    # produces a new file name, and stale files are removed on rebuild
+    digest = hashlib.sha1()
+    for array in (color_convert.RGB_TO_XYZ, color_convert.WHITE,
+                  color_convert.SRGB_TO_LINEAR_TABLE):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def pack_rgb(rgb):
+    rgb = np.asarray(rgb)
+    if rgb.dtype != np.uint8:
+        if not np.issubdtype(rgb.dtype, np.integer) and np.any(rgb != np.round(rgb)):
+            raise ValueError("Lookup tables only accept integer RGB values")
+        if rgb.size and (rgb.min() < 0 or rgb.max() > 255):
+            raise ValueError("RGB values must be in range 0-255")
+    rgb = rgb.astype(np.intp)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def unpack_rgb(index):
+    index = np.asarray(index)
+    return np.stack([(index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF],
+                    axis=-1).astype(np.uint8)
+
+
+class ColorTable:
+    def __init__(self, name, convert, channels, directory=None):
+        self.name = name
+        self.convert = convert
+        self.channels = channels
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.table = None
+        self.builds = 0
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f"{self.name}_{_formula_key()}.npy")
+
+    def load(self):
+        if self.table is None:
+            try:
+                table = np.load(self.path, mmap_mode="r")
+                if table.shape != (TABLE_SIZE, self.channels) or table.dtype != np.float32:
+                    raise ValueError(f"Unexpected table layout in {self.path}")
+                self.table = table
+            except (OSError, ValueError):
+                self.build()
+        return self.table
+
+    def build(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.evict()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+
+        # Build block by block so only one block of float64 results is live
+        table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                          shape=(TABLE_SIZE, self.channels))
+        for start in range(0, TABLE_SIZE, BUILD_BLOCK):
+            index = np.arange(start, start + BUILD_BLOCK)
+            table[start:start + BUILD_BLOCK] = self.convert(unpack_rgb(index))
+        table.flush()
+        del table
+
+        os.replace(tmp_path, self.path)
+        self.remove_stale()
+        self.builds += 1
+        self.table = np.load(self.path, mmap_mode="r")
+
+    def remove_stale(self):
+        current = os.path.basename(self.path)
+        for filename in os.listdir(self.directory):
+            if (filename.startswith(f"{self.name}_") and filename.endswith(".npy")
+                    and filename != current):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def evict(self, delete=False):
+        # Drop the mapping; the next lookup maps the file again (or rebuilds
+        # it if delete=True)
+        self.table = None
+        if delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def lookup(self, rgb):
+        return self.load()[pack_rgb(rgb)]
+
+
+RGB_TO_LAB = ColorTable("rgb_to_lab", color_convert.rgb_to_lab, 3)
+RGB_TO_CMYK = ColorTable("rgb_to_cmyk", color_convert.rgb_to_cmyk, 4)
+
+
+def rgb_to_lab(rgb):
+    return RGB_TO_LAB.lookup(rgb)
+
+
+def rgb_to_cmyk(rgb):
+    return RGB_TO_CMYK.lookup(rgb)
+
+
+def evict_all(delete=False):
+    for table in (RGB_TO_LAB, RGB_TO_CMYK):
+        table.evict(delete)
@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+import color_convert
+import delta_e
+
+# Nearest-palette-color lookup in Lab space. The palette is converted to Lab
+# once and bucketed on a uniform grid; every grid cell that receives queries
+# gets a candidate list from a ring search over the neighbouring buckets,
+# memoized in a bounded LRU, so each query is compared against a handful of
+# palette colors instead of the whole palette.
+
+DEFAULT_CELL_SIZE = 8.0
+QUERY_CHUNK = 1 << 16
+MAX_CACHED_CELLS = 16384
+
+# CIE2000 is not a Euclidean distance in Lab, so its candidates are taken
+# from a wider CIE76 neighbourhood and re-ranked. This makes CIE2000
+# matches approximate; raise the slack for more accuracy.
+CIE2000_SLACK = 2.0
+
+_CELL_OFFSET = 1 << 15
+_CELL_SPAN = 1 << 16
+
+
+def parse_hex(value):
+    value = value.strip().lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    if len(value) != 6:
+        raise ValueError(f"Invalid hex color: {value!r}")
+    return [int(value[i:i + 2], 16) for i in (0, 2, 4)]
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return list(data.items())
+    entries = []
+    for entry in data:
+        if isinstance(entry, dict):
+            entries.append((entry.get("name") or entry["hex"], entry["hex"]))
+        else:
+            entries.append((entry, entry))
+    return entries
+
+
+def _read_csv(path):
+    entries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {key.strip().lower(): value for key, value in row.items() if key}
+            if "hex" in row:
+                color = row["hex"]
+            else:
+                color = [int(row[channel]) for channel in ("r", "g", "b")]
+            entries.append((row.get("name") or str(color), color))
+    return entries
+
+
+def _read_text(path):
+    # One color per line: "#rrggbb" or "name #rrggbb"
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts or line.startswith("//"):
+                continue
+            name = " ".join(parts[:-1]) or parts[-1]
+            entries.append((name, parts[-1]))
+    return entries
+
+
+def load_palette(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        entries = _read_json(path)
+    elif ext == ".csv":
+        entries = _read_csv(path)
+    else:
+        entries = _read_text(path)
+
+    names = [name for name, _ in entries]
+    colors = [parse_hex(color) if isinstance(color, str) else color for _, color in entries]
+    for name, color in zip(names, colors):
+        if len(color) != 3 or not all(0 <= channel <= 255 for channel in color):
+            raise ValueError(f"Invalid RGB color for {name}: {color}")
+    return names, np.array(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+class PaletteIndex:
+    def __init__(self, names, rgb, cell_size=DEFAULT_CELL_SIZE):
+        self.names = list(names)
+        self.rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+        if not len(self.rgb):
+            raise ValueError("Palette is empty")
+        self.lab = color_convert.rgb_to_lab(self.rgb)
+        self.cell_size = cell_size
+        self.cells = OrderedDict()  # (cell, slack) -> candidates, oldest first
+
+        # Buckets: palette indices sorted by cell, and a dense grid over the
+        # palette's bounding box holding each occupied cell's bucket number
+        cells = np.floor(self.lab / cell_size).astype(np.int64)
+        self.cell_min = cells.min(axis=0)
+        self.cell_max = cells.max(axis=0)
+        offsets = cells - self.cell_min
+        occupied, bucket = np.unique(offsets, axis=0, return_inverse=True)
+        bucket = bucket.ravel()
+        self.order = np.argsort(bucket, kind="stable")
+        self.starts = np.concatenate([[0], np.cumsum(np.bincount(bucket))])
+        self.grid = np.full(self.cell_max - self.cell_min + 1, -1, dtype=np.int32)
+        self.grid[tuple(occupied.T)] = np.arange(len(occupied))
+
+    def __len__(self):
+        return len(self.rgb)
+
+    def _ring(self, cell, radius):
+        # Palette indices in the cells at Chebyshev distance radius from cell,
+        # or None once the ring lies entirely outside the palette's buckets
+        low = cell - radius
+        high = cell + radius
+        if radius and (low + 1 <= self.cell_min).all() and (high - 1 >= self.cell_max).all():
+            return None
+        start = np.maximum(low, self.cell_min)
+        stop = np.minimum(high, self.cell_max)
+        if (start > stop).any():
+            return np.empty(0, dtype=np.intp)
+        block = self.grid[tuple(slice(a, b + 1) for a, b in zip(start - self.cell_min, stop - self.cell_min))]
+        if radius:
+            # Drop the cells of the inner rings, already searched
+            inner_start = np.maximum(low + 1, start)
+            inner_stop = np.minimum(high - 1, stop)
+            if (inner_start <= inner_stop).all():
+                block = block.copy()
+                block[tuple(slice(a, b + 1) for a, b in zip(inner_start - start, inner_stop - start))] = -1
+        buckets = block[block >= 0]
+        if not len(buckets):
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self.order[self.starts[b]:self.starts[b + 1]] for b in buckets])
+
+    def candidates(self, cell, slack=1.0):
+        # Palette colors that can be nearest to some point of the cell: any
+        # color whose distance to the cell box is at most the smallest
+        # "farthest corner" distance over the palette. Rings of buckets are
+        # searched outwards until every color in the next ring is farther
+        # from the cell than that bound.
+        key = (cell, slack)
+        if key in self.cells:
+            self.cells.move_to_end(key)
+            return self.cells[key]
+
+        center = np.array(cell, dtype=np.int64)
+        low = center * self.cell_size
+        high = low + self.cell_size
+        found = []
+        bound = np.inf
+        radius = 0
+        while radius == 0 or (radius - 1) * self.cell_size <= bound:
+            ring = self._ring(center, radius)
+            if ring is None:
+                break
+            if len(ring):
+                lab = self.lab[ring]
+                far = np.linalg.norm(np.maximum(np.abs(lab - low), np.abs(lab - high)), axis=1)
+                bound = min(bound, far.min() * slack)
+                found.append(ring)
+            radius += 1
+
+        found = np.sort(np.concatenate(found))
+        lab = self.lab[found]
+        near = np.linalg.norm(np.clip(lab, low, high) - lab, axis=1)
+        candidates = found[near <= bound]
+
+        self.cells[key] = candidates
+        if len(self.cells) > MAX_CACHED_CELLS:
+            self.cells.popitem(last=False)
+        return candidates
+
+    def nearest(self, lab, metric="cie76"):
+        # Returns (palette index, distance) for every query color
+        distance = delta_e.get_metric(metric)
+        slack = CIE2000_SLACK if metric == "cie2000" else 1.0
+
+        lab = np.asarray(lab, dtype=np.float64)
+        shape = lab.shape[:-1]
+        flat = lab.reshape(-1, 3)
+        cells = np.floor(flat / self.cell_size).astype(np.int64)
+        keys = ((cells[:, 0] + _CELL_OFFSET) * _CELL_SPAN + cells[:, 1] + _CELL_OFFSET) \
+            * _CELL_SPAN + cells[:, 2] + _CELL_OFFSET
+
+        # Group queries by grid cell and search each group against the
+        # cell's candidate list
+        _, first, inverse, counts = np.unique(keys, return_index=True,
+                                              return_inverse=True, return_counts=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        stops = np.cumsum(counts)
+
+        index = np.empty(len(flat), dtype=np.intp)
+        dist = np.empty(len(flat))
+        for cell_row, start, stop in zip(first, stops - counts, stops):
+            candidates = self.candidates(tuple(cells[cell_row].tolist()), slack)
+            palette_lab = self.lab[candidates][None, :, :]
+            for chunk in range(start, stop, QUERY_CHUNK):
+                rows = order[chunk:min(chunk + QUERY_CHUNK, stop)]
+                d = distance(flat[rows][:, None, :], palette_lab)
+                best = d.argmin(axis=1)
+                index[rows] = candidates[best]
+                dist[rows] = d[np.arange(len(rows)), best]
+
+        return index.reshape(shape), dist.reshape(shape)
+
+    def nearest_rgb(self, rgb, metric="cie76"):
+        # Photos repeat colors heavily, so only unique colors are searched
+        rgb = np.asarray(rgb)
+        shape = rgb.shape[:-1]
+        packed = rgb.reshape(-1, 3).astype(np.int64)
+        packed = (packed[:, 0] << 16) | (packed[:, 1] << 8) | packed[:, 2]
+        unique, inverse = np.unique(packed, return_inverse=True)
+        unique_rgb = np.column_stack([unique >> 16, (unique >> 8) & 0xFF, unique & 0xFF])
+
+        index, dist = self.nearest(color_convert.rgb_to_lab(unique_rgb), metric)
+        inverse = inverse.ravel()
+        return index[inverse].reshape(shape), dist[inverse].reshape(shape)
+
+
+@lru_cache(maxsize=8)
+def _cached_index(path, mtime_ns, size, cell_size):
+    names, rgb = load_palette(path)
+    return PaletteIndex(names, rgb, cell_size)
+
+
+def load_index(path, cell_size=DEFAULT_CELL_SIZE):
+    # Indexes are memoized per file; editing the file invalidates the entry
+    stat = os.stat(path)
+    return _cached_index(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, cell_size)
@@ -0,0 +1,21 @@
+import io
+import color_cli
+
+
+def convert(text, source="hex", target="rgb", **options):
+    output = io.StringIO()
+    count, _ = color_cli.run(source, target, io.StringIO(text), output, **options)
+    return count, output.getvalue()
+
+
+def test_empty_csv_converts_nothing():
+    assert convert("") == (0, "")
+    assert convert("", skip_invalid=True) == (0, "")
+
+
+def test_empty_jsonl_converts_nothing():
+    assert convert("", input_format="jsonl") == (0, "")
+
+
+def test_csv_header_without_rows():
+    assert convert("hex\n") == (0, "")
@@ -0,0 +1,146 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import exiftool
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+import metadata
+from exiftool_pool import ExifToolPool
+from search_index import SearchIndex, predicate
+
+FORMATS = [("png", "PNG"), ("jpg", "JPEG"), ("gif", "GIF"),
+           ("bmp", "BMP"), ("tif", "TIFF"), ("pcx", "PCX")]
+
+
+def make_folder(folder, count, size=64, seed=0):
+    # Mixed-format folder of small synthetic images
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        ext, fmt = FORMATS[i % len(FORMATS)]
+        pixels = rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels)
+        if fmt == "GIF":
+            image = image.convert("P")
+        path = os.path.join(folder, f"image_{i:06d}.{ext}")
+        dpi = (72, 150, 300)[i % 3]
+        options = {"dpi": (dpi, dpi)} if fmt in ("JPEG", "TIFF", "PNG") else {}
+        image.save(path, fmt, **options)
+        paths.append(path)
+    return paths
+
+
+def per_file(et, paths):
+    # The original ImageInfoViewer loop: one get_metadata call per file
+    return [metadata.extract_important_fields(et.get_metadata(path)[0]) for path in paths]
+
+
+def batched(et, paths, batch_size, fast=False):
+    return [info for _, info, _ in metadata.extract_info(et, paths, batch_size, fast)]
+
+
+def pooled(pool, paths, batch_size):
+    # Scanner-style: one caller thread per process, each submitting batches.
+    # The header reader is off, so every file goes through exiftool.
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        return [info for results in executor.map(lambda batch: pool.extract(batch, batch_size, False), batches)
+                for _, info, _ in results]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(count, batch_sizes, pool_sizes):
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_folder(folder, count)
+        with exiftool.ExifToolHelper(encoding="utf-8") as et:
+            expected, elapsed = timed(per_file, et, paths)
+            print(f"{'mode':<16}{'files/s':>12}{'speedup':>10}{'matches':>10}")
+            baseline = count / elapsed
+            print(f"{'per-file':<16}{baseline:>12,.1f}{1:>9.1f}x{'-':>10}")
+
+            for batch_size in batch_sizes:
+                result, elapsed = timed(batched, et, paths, batch_size)
+                rate = count / elapsed
+                matches = sum(a == b for a, b in zip(expected, result))
+                print(f"{f'batch {batch_size}':<16}{rate:>12,.1f}{rate / baseline:>9.1f}x"
+                      f"{matches:>10}")
+
+            # Native header reader, exiftool only for files it rejects
+            result, elapsed = timed(batched, et, paths, metadata.DEFAULT_BATCH_SIZE, True)
+            rate = count / elapsed
+            matches = sum(a == b for a, b in zip(expected, result))
+            print(f"{'headers':<16}{rate:>12,.1f}{rate / baseline:>9.1f}x{matches:>10}")
+
+        for size in pool_sizes:
+            with ExifToolPool(size) as pool:
+                # Start every process before timing
+                pooled(pool, paths[:size], 1)
+                result, elapsed = timed(pooled, pool, paths, metadata.DEFAULT_BATCH_SIZE)
+            rate = count / elapsed
+            matches = sum(a == b for a, b in zip(expected, result))
+            print(f"{f'pool {size}':<16}{rate:>12,.1f}{rate / baseline:>9.1f}x{matches:>10}")
+
+
+SEARCH_QUERIES = [
+    "FileType=TIFF XResolution>=300 ImageWidth>4000",
+    "FileType=JPEG ImageWidth>=7900 ImageHeight<1000",
+    "ColorSpace=RGB BitsPerSample=\"8 8 8\"",
+    "FileType=TIFF BitsPerSample>=8",
+    "BitsPerSample=\"16\"",
+    "ImageWidth=1920",
+]
+
+
+def synthetic_records(count, seed=0):
+    rng = random.Random(seed)
+    types = [fmt for _, fmt in FORMATS]
+    for i in range(count):
+        info = {'FileName': f"image_{i:07d}", 'FileType': rng.choice(types),
+                'ImageWidth': rng.randint(16, 8000), 'ImageHeight': rng.randint(16, 6000)}
+        if info['FileType'] in ("JPEG", "TIFF"):
+            info['XResolution'] = info['YResolution'] = rng.choice([72, 96, 150, 300, 600])
+        if info['FileType'] == "TIFF":
+            info['ColorSpace'] = rng.choice(["RGB ", "CMYK", "GRAY"])
+            info['BitsPerSample'] = rng.choice(["8 8 8", 8, 16])
+        yield i, info
+
+
+def run_search(count):
+    index = SearchIndex(metadata.FIELD_NAMES)
+    _, elapsed = timed(lambda: [index.add(i, info) for i, info in synthetic_records(count)])
+    print(f"indexed {count:,} records in {elapsed:.2f}s")
+    # The first query pays for sorting the numeric indexes
+    _, elapsed = timed(index.search, "ImageWidth>0 ImageHeight>0 XResolution>0")
+    print(f"sorted numeric indexes in {elapsed:.2f}s")
+
+    print(f"{'query':<52}{'hits':>8}{'index ms':>10}{'scan ms':>10}")
+    for query in SEARCH_QUERIES:
+        result, elapsed = timed(index.search, query)
+        matchers = [predicate(*condition) for condition in index.parse(query)]
+        expected, scan_elapsed = timed(lambda: [i for i, info in index.records.items()
+                                                if all(match(info) for match in matchers)])
+        assert result == expected
+        print(f"{query:<52}{len(result):>8}{elapsed * 1000:>10.1f}{scan_elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Metadata extraction throughput benchmark")
+    parser.add_argument("--count", type=int, default=600, help="synthetic images to generate")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--pool-sizes", type=int, nargs="*", default=[1, 2, 4],
+                        help="exiftool processes to compare, batch size %d" % metadata.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--search", type=int, metavar="RECORDS",
+                        help="benchmark metadata search over synthetic records instead")
+    args = parser.parse_args()
+    if args.search:
+        run_search(args.search)
+    else:
+        run(args.count, args.batch_sizes, args.pool_sizes)
@@ -0,0 +1,160 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import exiftool
+from exiftool.exceptions import ExifToolException, ExifToolExecuteError
+import metadata
+
+# A fixed set of long-running exiftool processes. Each process is owned by
+# its own worker thread, which takes batches from a shared queue, so N
+# processes keep N cores busy and a process that dies mid-batch is replaced
+# and the batch retried. The owning thread must outlive its process:
+# pyexiftool ties the child's lifetime to the thread that started it.
+
+DEFAULT_SIZE = min(os.cpu_count() or 1, 8)
+
+
+def default_factory():
+    return exiftool.ExifToolHelper(encoding="utf-8")
+
+
+class PoolWorker:
+    def __init__(self, worker_id, factory, jobs):
+        self.worker_id = worker_id
+        self.factory = factory
+        self.jobs = jobs
+        self.helper = None
+        self.batches = 0
+        self.files = 0
+        self.errors = 0
+        self.restarts = 0
+        self.busy_seconds = 0.0
+        self.thread = threading.Thread(target=self.run, name=f"exiftool-{worker_id}", daemon=True)
+
+    def run(self):
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    return
+                future, method, args = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(method(self, *args))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            self.stop()
+
+    def ensure_running(self):
+        # Processes are started on first use, so an idle pool costs nothing
+        if self.helper is None or not self.helper.running:
+            if self.helper is not None:
+                self.restarts += 1
+                self.stop()
+            self.helper = self.factory()
+        return self.helper
+
+    def call(self, function, *args):
+        # function(helper, *args) on this worker's process
+        start = time.perf_counter()
+        try:
+            try:
+                return function(self.ensure_running(), *args)
+            except ExifToolExecuteError:
+                # exiftool ran and reported an error for the file
+                raise
+            except (ExifToolException, OSError, ValueError):
+                # The process crashed or produced garbage: start a fresh one
+                # and retry once before giving up
+                self.stop()
+                self.restarts += 1
+                return function(self.ensure_running(), *args)
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    def extract(self, paths, batch_size, fast=True):
+        results = self.call(lambda helper: list(metadata.extract_info(helper, paths, batch_size, fast)))
+        self.batches += 1
+        self.files += len(results)
+        self.errors += sum(1 for _, info, _ in results if info is None)
+        return results
+
+    def stop(self):
+        helper, self.helper = self.helper, None
+        if helper is not None and helper.running:
+            try:
+                helper.terminate()
+            except (ExifToolException, OSError):
+                pass
+
+    def stats(self):
+        return {
+            "worker": self.worker_id,
+            "running": self.helper is not None,
+            "batches": self.batches,
+            "files": self.files,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+class ExifToolPool:
+    def __init__(self, size=DEFAULT_SIZE, factory=default_factory):
+        self.size = size
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.workers = [PoolWorker(i, factory, self.jobs) for i in range(size)]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def _put(self, method, *args):
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("ExifTool pool is closed")
+            self.jobs.put((future, method, args))
+        return future
+
+    def submit(self, paths, batch_size=metadata.DEFAULT_BATCH_SIZE, fast=True):
+        # Future of [(path, info, error)], run by whichever process is free
+        return self._put(PoolWorker.extract, list(paths), batch_size, fast)
+
+    def run(self, function, *args):
+        # Future of function(helper, *args) for any other exiftool call
+        return self._put(PoolWorker.call, function, *args)
+
+    def extract(self, paths, batch_size=metadata.DEFAULT_BATCH_SIZE, fast=True):
+        return self.submit(paths, batch_size, fast).result()
+
+    def stats(self):
+        return [worker.stats() for worker in self.workers]
+
+    def close(self):
+        # Queued batches are cancelled; running ones finish before the
+        # processes are stopped
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            job[0].cancel()
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
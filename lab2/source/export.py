@@ -0,0 +1,242 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+import metadata
+from exiftool_pool import ExifToolPool, DEFAULT_SIZE
+from metadata_cache import MetadataCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Streaming export of extracted metadata. Files are walked lazily, a bounded
+# number of batches is in flight on the exiftool pool at a time, and every
+# record is written as soon as its batch is done, so memory stays flat no
+# matter how many files the tree holds. Records come out in walk order.
+#
+#   python export.py FOLDER -o images.csv -r
+#   python export.py FOLDER -o images.parquet --workers 8
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+# One column per field any file type can have; the set is fixed, so CSV and
+# Parquet headers can be written before the first record is seen
+COLUMNS = ['SourceFile'] + metadata.FIELD_NAMES + ['Error']
+
+# Parquet column types. exiftool -n gives numbers for these; everything else
+# (including BitsPerSample "8 8 8" and BMP codec names) is kept as text
+INTEGER_FIELDS = {'ImageWidth', 'ImageHeight', 'BitDepth', 'ColorType', 'ColorComponents',
+                  'ColorResolutionDepth', 'BitsPerPixel', 'SamplesPerPixel', 'ResolutionUnit',
+                  'PixelsPerMeterX', 'PixelsPerMeterY'}
+FLOAT_FIELDS = {'XResolution', 'YResolution'}
+
+# Records buffered per Parquet row group
+ROW_GROUP_SIZE = 65536
+
+
+def iter_records(paths, pool, cache=None, batch_size=metadata.DEFAULT_BATCH_SIZE, in_flight=None):
+    # Yields (path, info, error) in input order. paths may be a generator;
+    # at most in_flight batches are read ahead of the writer.
+    in_flight = in_flight or 2 * pool.size
+    pending = deque()
+
+    def finish(batch):
+        paths, hits, future = batch
+        results = {path: (info, error) for path, info, error in future.result()} if future else {}
+        for path in paths:
+            if path in hits:
+                yield path, hits[path], None
+                continue
+            info, error = results[path]
+            if info and cache:
+                cache.put(path, info)
+            yield path, info, error
+
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == batch_size:
+            pending.append(_start(batch, pool, cache, batch_size))
+            batch = []
+            if len(pending) >= in_flight:
+                yield from finish(pending.popleft())
+    if batch:
+        pending.append(_start(batch, pool, cache, batch_size))
+    while pending:
+        yield from finish(pending.popleft())
+
+
+def _start(batch, pool, cache, batch_size):
+    hits = {}
+    if cache:
+        for path in batch:
+            info = cache.get(path)
+            if info is not None:
+                hits[path] = info
+    missing = [path for path in batch if path not in hits]
+    future = pool.submit(missing, batch_size) if missing else None
+    return batch, hits, future
+
+
+def _text(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(map(str, value))
+    return value
+
+
+class CsvExporter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, COLUMNS, restval='', extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, path, info, error):
+        row = {field: _text(value) for field, value in (info or {}).items() if value is not None}
+        row['SourceFile'] = path
+        if error:
+            row['Error'] = error
+        self.writer.writerow(row)
+
+    def close(self):
+        pass
+
+
+class JsonlExporter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, path, info, error):
+        record = {'SourceFile': path}
+        record.update((field, value) for field, value in (info or {}).items() if value is not None)
+        if error:
+            record['Error'] = error
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        pass
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parquet_type(field):
+    if field in INTEGER_FIELDS:
+        return pa.int64()
+    if field in FLOAT_FIELDS:
+        return pa.float64()
+    return pa.string()
+
+
+def _parquet_value(field, value):
+    if value is None:
+        return None
+    if field in INTEGER_FIELDS or field in FLOAT_FIELDS:
+        if not _is_number(value):
+            return None
+        return int(value) if field in INTEGER_FIELDS else float(value)
+    return str(_text(value))
+
+
+class ParquetExporter:
+    def __init__(self, path):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pa.schema([(field, _parquet_type(field)) for field in COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.columns = {field: [] for field in COLUMNS}
+        self.rows = 0
+
+    def write(self, path, info, error):
+        info = info or {}
+        for field, column in self.columns.items():
+            column.append(_parquet_value(field, info.get(field)))
+        self.columns['SourceFile'][-1] = path
+        self.columns['Error'][-1] = error
+        self.rows += 1
+        if self.rows == ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(pa.table(self.columns, schema=self.schema))
+            self.columns = {field: [] for field in COLUMNS}
+            self.rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def guess_format(output):
+    extension = os.path.splitext(output)[1].lower().lstrip('.')
+    if extension in ('json', 'ndjson'):
+        return 'jsonl'
+    return extension if extension in FORMATS else 'csv'
+
+
+def export(folder, output, fmt=None, recursive=False, workers=DEFAULT_SIZE,
+           batch_size=metadata.DEFAULT_BATCH_SIZE, cache=None, progress=None):
+    # Returns (records written, records with errors). output '-' is stdout.
+    fmt = fmt or guess_format(output)
+    if fmt == 'parquet' and output == '-':
+        raise ValueError("Parquet cannot be written to stdout")
+    paths = (entry.path for entry in metadata.iter_images(folder, recursive))
+
+    stream = None
+    if fmt == 'parquet':
+        exporter = ParquetExporter(output)
+    else:
+        stream = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        exporter = CsvExporter(stream) if fmt == 'csv' else JsonlExporter(stream)
+
+    written = errors = 0
+    try:
+        with ExifToolPool(workers) as pool:
+            for path, info, error in iter_records(paths, pool, cache, batch_size):
+                exporter.write(path, info, error)
+                written += 1
+                errors += info is None
+                if progress and written % 1000 == 0:
+                    progress(written)
+    finally:
+        # Also on errors, so the Parquet writer releases its file
+        try:
+            exporter.close()
+        finally:
+            if stream is not None and stream is not sys.stdout:
+                stream.close()
+    return written, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export image metadata of a folder")
+    parser.add_argument("folder")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    parser.add_argument("-f", "--format", choices=FORMATS,
+                        help="output format, guessed from the output extension by default")
+    parser.add_argument("-r", "--recursive", action="store_true", help="include subfolders")
+    parser.add_argument("--workers", type=int, default=DEFAULT_SIZE, help="exiftool processes")
+    parser.add_argument("--batch-size", type=int, default=metadata.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-cache", action="store_true", help="do not use the metadata cache")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else MetadataCache()
+    start = time.perf_counter()
+    try:
+        written, errors = export(args.folder, args.output, args.format, args.recursive,
+                                 args.workers, args.batch_size, cache,
+                                 progress=lambda n: print(f"{n} files...", file=sys.stderr))
+    except (OSError, RuntimeError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        if cache:
+            cache.close()
+    elapsed = time.perf_counter() - start
+    print(f"Exported {written} files ({errors} errors) in {elapsed:.2f} s, "
+          f"{written / max(elapsed, 1e-9):.0f} files/s", file=sys.stderr)
@@ -0,0 +1,210 @@
+import mmap
+import os
+import struct
+
+# Native reader for the header fields shown by ImageInfoViewer. Everything
+# needed sits in the first few KB of PNG, JPEG, GIF, BMP, PCX and TIFF files,
+# so one small read usually suffices; JPEG and TIFF files whose headers run
+# past it are mapped instead. Results use the same "Group:Tag" keys and
+# numeric values as `exiftool -G -n`, so they can stand in for get_tags output.
+
+HEAD_SIZE = 16 * 1024
+
+# TIFF field types: (struct code, size in bytes)
+TIFF_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8), 7: ('B', 1),
+              6: ('b', 1), 8: ('h', 2), 9: ('i', 4), 10: ('ii', 8)}
+
+TIFF_TAGS = {
+    0x100: 'EXIF:ImageWidth',
+    0x101: 'EXIF:ImageHeight',
+    0x102: 'EXIF:BitsPerSample',
+    0x115: 'EXIF:SamplesPerPixel',
+    0x11a: 'EXIF:XResolution',
+    0x11b: 'EXIF:YResolution',
+    0x128: 'EXIF:ResolutionUnit',
+}
+TIFF_ICC_PROFILE = 0x8773
+
+
+def _number(value):
+    # exiftool prints rationals with 10 significant digits
+    value = float(f"{value:.10g}")
+    return int(value) if value.is_integer() else value
+
+
+def parse_png(data):
+    if data[12:16] != b'IHDR':
+        return None
+    width, height, depth, color_type, compression = struct.unpack_from('>IIBBB', data, 16)
+    return {
+        'File:FileType': 'PNG',
+        'PNG:ImageWidth': width,
+        'PNG:ImageHeight': height,
+        'PNG:BitDepth': depth,
+        'PNG:ColorType': color_type,
+        'PNG:Compression': compression,
+    }
+
+
+def parse_gif(data):
+    width, height, packed = struct.unpack_from('<HHB', data, 6)
+    return {
+        'File:FileType': 'GIF',
+        'GIF:ImageWidth': width,
+        'GIF:ImageHeight': height,
+        'GIF:ColorResolutionDepth': ((packed >> 4) & 0x07) + 1,
+        'GIF:BitsPerPixel': (packed & 0x07) + 1,
+    }
+
+
+def parse_bmp(data):
+    header_size, = struct.unpack_from('<I', data, 14)
+    if header_size in (12, 16, 64):
+        # OS/2 bitmaps only carry the size and depth
+        width, height, _, depth = struct.unpack_from('<HHHH', data, 18)
+        return {
+            'File:FileType': 'BMP',
+            'File:ImageWidth': width,
+            'File:ImageHeight': height,
+            'File:BitDepth': depth,
+        }
+    if not 40 <= header_size < 1000000:
+        return None
+    width, height, _, depth, compression, _, ppm_x, ppm_y = struct.unpack_from('<IiHHIIII', data, 18)
+    if compression > 256:
+        # Video codec ids stored as text
+        compression = struct.pack('<I', compression).rstrip(b'\0 ').decode('latin-1')
+    return {
+        'File:FileType': 'BMP',
+        'File:ImageWidth': width,
+        'File:ImageHeight': abs(height),
+        'File:BitDepth': depth,
+        'File:Compression': compression,
+        'File:PixelsPerMeterX': ppm_x,
+        'File:PixelsPerMeterY': ppm_y,
+    }
+
+
+def parse_pcx(data):
+    if len(data) < 0x50 or data[1] > 5 or data[2] != 1 or data[3] not in (1, 2, 4, 8) or data[0x44] > 2:
+        return None
+    left, top, right, bottom, x_dpi, y_dpi = struct.unpack_from('<HHHHHH', data, 4)
+    # The DPI fields are 16-bit; exiftool only reads their low byte, so 300
+    # dpi comes out as 44 there and must here too
+    return {
+        'File:FileType': 'PCX',
+        'File:ImageWidth': right - left + 1,
+        'File:ImageHeight': bottom - top + 1,
+        'File:XResolution': x_dpi & 0xff,
+        'File:YResolution': y_dpi & 0xff,
+        'File:BitsPerPixel': data[3],
+    }
+
+
+def parse_jpeg(data):
+    fields = {'File:FileType': 'JPEG'}
+    jfif = size = False
+    pos = 2
+    while not size or not jfif:
+        if data[pos] != 0xff:
+            return None
+        while data[pos] == 0xff:
+            pos += 1
+        marker = data[pos]
+        pos += 1
+        if marker == 0x01 or 0xd0 <= marker <= 0xd8:
+            continue
+        if marker in (0xd9, 0xda):
+            # Image data follows, no more headers to look at
+            break
+        length, = struct.unpack_from('>H', data, pos)
+        if marker == 0xe0 and not jfif and bytes(data[pos + 2:pos + 7]) == b'JFIF\0':
+            unit, x_res, y_res = struct.unpack_from('>BHH', data, pos + 9)
+            fields['JFIF:ResolutionUnit'] = unit
+            fields['JFIF:XResolution'] = x_res
+            fields['JFIF:YResolution'] = y_res
+            jfif = True
+        elif (marker & 0xf0) == 0xc0 and (marker == 0xc0 or marker & 0x03) and not size:
+            # SOF0-SOF15 except DHT, JPG and DAC
+            bits, height, width, components = struct.unpack_from('>BHHB', data, pos + 2)
+            fields['File:ImageWidth'] = width
+            fields['File:ImageHeight'] = height
+            fields['File:BitsPerSample'] = bits
+            fields['File:ColorComponents'] = components
+            size = True
+        pos += length
+    return fields if size else None
+
+
+def _tiff_value(data, order, field_type, count, offset):
+    code, size = TIFF_TYPES[field_type]
+    values = struct.unpack_from(f"{order}{code * count}", data, offset)
+    if field_type in (5, 10):
+        values = [_number(n / d) if d else None for n, d in zip(values[::2], values[1::2])]
+        if None in values:
+            raise ValueError("zero denominator")
+    if count == 1:
+        return values[0]
+    return ' '.join(str(value) for value in values)
+
+
+def parse_tiff(data):
+    order = '<' if data[:2] == b'II' else '>'
+    ifd, = struct.unpack_from(order + 'I', data, 4)
+    count, = struct.unpack_from(order + 'H', data, ifd)
+    fields = {'File:FileType': 'TIFF'}
+    for entry in range(ifd + 2, ifd + 2 + 12 * count, 12):
+        tag, field_type, values = struct.unpack_from(order + 'HHI', data, entry)
+        if field_type not in TIFF_TYPES or (tag not in TIFF_TAGS and tag != TIFF_ICC_PROFILE):
+            continue
+        offset = entry + 8
+        if TIFF_TYPES[field_type][1] * values > 4:
+            offset, = struct.unpack_from(order + 'I', data, offset)
+        if tag == TIFF_ICC_PROFILE:
+            space = bytes(data[offset + 16:offset + 20])
+            if len(space) < 4:
+                raise struct.error("ICC profile past end of data")
+            fields['ICC_Profile:ColorSpaceData'] = space.split(b'\0')[0].decode('latin-1')
+        elif values:
+            fields[TIFF_TAGS[tag]] = _tiff_value(data, order, field_type, values, offset)
+    return fields
+
+
+# (magic prefix, parser), checked in order
+PARSERS = [
+    (b'\x89PNG\r\n\x1a\n', parse_png),
+    (b'\xff\xd8', parse_jpeg),
+    (b'GIF87a', parse_gif),
+    (b'GIF89a', parse_gif),
+    (b'BM', parse_bmp),
+    (b'II*\0', parse_tiff),
+    (b'MM\0*', parse_tiff),
+    (b'\x0a', parse_pcx),
+]
+
+
+def _parse(parser, data):
+    try:
+        return parser(data)
+    except (struct.error, IndexError, ValueError):
+        return None
+
+
+def read_header(path):
+    # Metadata dict like ExifToolHelper.get_tags returns, or None when the
+    # file is not one of the formats above or its header cannot be parsed
+    with open(path, 'rb') as f:
+        data = f.read(HEAD_SIZE)
+        parser = next((parser for magic, parser in PARSERS if data.startswith(magic)), None)
+        if parser is None:
+            return None
+        fields = _parse(parser, data)
+        if fields is None and len(data) == HEAD_SIZE:
+            # Headers continue past the first read (large APP segments,
+            # IFD or ICC profile stored at the end of the file)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                fields = _parse(parser, mapped)
+    if fields is not None:
+        fields['SourceFile'] = path
+        fields['File:FileName'] = os.path.basename(path)
+    return fields
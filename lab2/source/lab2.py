@@ -1,8 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import exiftool
+import time
+from bisect import bisect, bisect_left
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import metadata
+import snapshot
+from exiftool_pool import ExifToolPool
+from metadata_cache import MetadataCache
+from scanner import FolderScanner
+from metadata_window import MetadataWindow
+from search_index import SearchIndex
+from virtual_table import VirtualTable
+
+SCAN_POLL_MS = 50
+# An active search is re-run at most this often while a scan adds images
+SEARCH_REFRESH_SECONDS = 1.0
+# Full tag listings kept in memory for the "All tags" view
+ALL_TAGS_CACHE_SIZE = 32
+# How often a watched folder is rescanned
+WATCH_INTERVAL_MS = 5000
 
 class ImageInfoViewer:
     def __init__(self, root):
@@ -10,12 +28,52 @@ class ImageInfoViewer:
         self.root.title("Image Metadata Viewer")
         self.root.geometry("800x600")
 
-        # Initialize ExifTool
-        self.et = exiftool.ExifToolHelper(encoding="utf-8")
+        # Pool of exiftool processes, one per scan worker thread
+        self.pool = ExifToolPool()
+        self.batch_size = metadata.DEFAULT_BATCH_SIZE
+
+        # Persistent metadata cache, so re-opened folders skip exiftool
+        self.cache = MetadataCache()
         
         self.images_info = []
+        self.image_paths = []
         self.current_index = 0
 
+        # Background folder scan state
+        self.scanner = None
+        self.scan_order = {}
+        self.image_order = []
+        self.incremental = False
+
+        # Watch/rescan: the scanned folder's last snapshot. Files added later
+        # get the next scan order, so they appear after the existing images.
+        self.folder = None
+        self.snapshot = {}
+        self.next_order = 0
+        self.snapshot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self.snapshot_future = None
+        self.last_rescan = None
+        self.watch_var = tk.BooleanVar(value=False)
+        self.watch_job = None
+
+        # Lazy mode: metadata is loaded around the current image only
+        self.window = None
+        self.window_polling = False
+        self.lazy_var = tk.BooleanVar(value=False)
+        self.recursive_var = tk.BooleanVar(value=False)
+
+        # Search over scanned images, keyed by scan order. While a search is
+        # active, current_index walks the matching images only.
+        self.index = SearchIndex(metadata.FIELD_NAMES)
+        self.search_text = ""
+        self.search_view = None
+        self.search_refreshed = 0.0
+
+        # "All tags" view: full exiftool output for the current image
+        self.all_tags_var = tk.BooleanVar(value=False)
+        self.all_tags = OrderedDict()
+        self.all_tags_request = None
+
         # Create main frame
         self.main_frame = ttk.Frame(root, padding="10")
         self.main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -31,6 +89,14 @@ class ImageInfoViewer:
         
         ttk.Button(self.button_frame, text="Select File", command=self.select_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.button_frame, text="Select Folder", command=self.select_folder).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.button_frame, text="Lazy", variable=self.lazy_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.button_frame, text="Include subfolders",
+                        variable=self.recursive_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.button_frame, text="All tags", variable=self.all_tags_var,
+                        command=self.update_display).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.button_frame, text="Rescan", command=self.rescan).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self.button_frame, text="Watch", variable=self.watch_var,
+                        command=self.toggle_watch).pack(side=tk.LEFT, padx=5)
 
         # Create navigation frame
         self.nav_frame = ttk.Frame(self.main_frame)
@@ -58,6 +124,13 @@ class ImageInfoViewer:
         self.search_frame = ttk.Frame(self.main_frame)
         self.search_frame.grid(row=3, column=0, columnspan=2, pady=(0, 10))
 
+        ttk.Label(self.search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.search_entry = ttk.Entry(self.search_frame, width=50)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
+        ttk.Button(self.search_frame, text="Search", command=self.run_search).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.search_frame, text="Clear", command=self.clear_search).pack(side=tk.LEFT, padx=5)
+
         # Create table
         self.tree = ttk.Treeview(self.main_frame, columns=("property", "value"), show="headings", height=25)
         self.tree.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -66,75 +139,97 @@ class ImageInfoViewer:
         self.tree.column("property", width=300)
         self.tree.column("value", width=600)
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        # Add scrollbar; the table fills a fixed set of rows as it scrolls
+        scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL)
         scrollbar.grid(row=4, column=2, sticky=(tk.N, tk.S))
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.table = VirtualTable(self.tree, scrollbar, rows=25)
+
+        # Status line with scan progress
+        self.status_frame = ttk.Frame(self.main_frame)
+        self.status_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        self.status_frame.grid_columnconfigure(0, weight=1)
+
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.grid(row=0, column=0, sticky=tk.W)
+        self.progress = ttk.Progressbar(self.status_frame, mode="determinate", length=200)
+        self.progress.grid(row=0, column=1, padx=5)
+        self.cancel_button = ttk.Button(self.status_frame, text="Cancel", command=self.cancel_scan,
+                                        state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=2)
 
         # Configure main_frame grid weights
         self.main_frame.grid_rowconfigure(4, weight=1)
 
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def get_image_info(self, filepath):
+        filepath = os.path.abspath(filepath)
+        info = self.cache.get(filepath)
+        if info is None:
+            info = self.extract_image_info(filepath)
+            if info:
+                self.cache.put(filepath, info)
+        return info
+
+    def extract_image_info(self, filepath):
         try:
-            metadata = self.et.get_metadata(filepath)[0]
-            # Create ordered dict with important fields first
-            important_fields = OrderedDict()
-            important_fields['FileName'] = metadata.get('File:FileName')
-            match metadata.get('File:FileType'):
-                case 'PNG':
-                    important_fields['ImageWidth'] = metadata.get('PNG:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('PNG:ImageHeight')
-                    important_fields['Compression'] = metadata.get('PNG:Compression')
-                    important_fields['BitDepth'] = metadata.get('PNG:BitDepth')
-                    important_fields['ColorType'] = metadata.get('PNG:ColorType')
-                case 'JPEG':
-                    important_fields['ImageWidth'] = metadata.get('File:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('File:ImageHeight')
-                    important_fields['XResolution'] = metadata.get('JFIF:XResolution')
-                    important_fields['YResolution'] = metadata.get('JFIF:YResolution')
-                    important_fields['ResolutionUnit'] = metadata.get('JFIF:ResolutionUnit')
-                    important_fields['BitsPerSample'] = metadata.get('File:BitsPerSample')
-                    important_fields['ColorComponents'] = metadata.get('File:ColorComponents')
-                case 'GIF':
-                    important_fields['ImageWidth'] = metadata.get('GIF:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('GIF:ImageHeight')
-                    important_fields['ColorResolutionDepth'] = metadata.get('GIF:ColorResolutionDepth')
-                    important_fields['BitsPerPixel'] = metadata.get('GIF:BitsPerPixel')
-                case 'TIFF':
-                    important_fields['ImageWidth'] = metadata.get('EXIF:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('EXIF:ImageHeight')
-                    important_fields['XResolution'] = metadata.get('EXIF:XResolution')
-                    important_fields['YResolution'] = metadata.get('EXIF:YResolution')
-                    important_fields['ResolutionUnit'] = metadata.get('EXIF:ResolutionUnit')
-                    important_fields['ColorSpace'] = metadata.get('ICC_Profile:ColorSpaceData')
-                    important_fields['BitsPerSample'] = metadata.get('EXIF:BitsPerSample')
-                    important_fields['SamplesPerPixel'] = metadata.get('EXIF:SamplesPerPixel')
-                case 'BMP':
-                    important_fields['ImageWidth'] = metadata.get('File:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('File:ImageHeight')
-                    important_fields['PixelsPerMeterX'] = metadata.get('File:PixelsPerMeterX')
-                    important_fields['PixelsPerMeterY'] = metadata.get('File:PixelsPerMeterY')
-                    important_fields['Compression'] = metadata.get('File:Compression')
-                    important_fields['BitDepth'] = metadata.get('File:BitDepth')
-                case 'PCX':
-                    important_fields['ImageWidth'] = metadata.get('File:ImageWidth')
-                    important_fields['ImageHeight'] = metadata.get('File:ImageHeight')
-                    important_fields['XResolution'] = metadata.get('File:XResolution')
-                    important_fields['YResolution'] = metadata.get('File:YResolution')
-                    important_fields['BitsPerPixel'] = metadata.get('File:BitsPerPixel')
-                    
-            return important_fields
+            for _, info, error in self.pool.extract([filepath]):
+                if error:
+                    raise RuntimeError(error)
+                return info
         except Exception as e:
             messagebox.showerror("Error", f"Error reading metadata: {str(e)}")
             return None
 
     def update_table(self, info):
-        self.tree.delete(*self.tree.get_children())
-        if info:
-            for key, value in info.items():
-                if isinstance(value, (list, tuple)):
-                    value = ', '.join(map(str, value))
-                self.tree.insert("", "end", values=(key, value))
+        self.table.show(info.items() if info else [])
+
+    def show_info(self, info):
+        # Shows the important fields, or every tag in "All tags" mode once loaded
+        if self.all_tags_var.get():
+            filepath = self.current_path()
+            tags = self.all_tags.get(filepath)
+            if tags is not None:
+                self.all_tags.move_to_end(filepath)
+                info = tags
+            else:
+                self.request_all_tags(filepath)
+        self.update_table(info)
+
+    def request_all_tags(self, filepath):
+        if self.all_tags_request is not None:
+            if self.all_tags_request[0] == filepath:
+                return
+            self.all_tags_request[1].cancel()
+        future = self.pool.run(metadata.get_all_tags, filepath)
+        self.all_tags_request = (filepath, future)
+        self.root.after(SCAN_POLL_MS, self.poll_all_tags, filepath, future)
+
+    def poll_all_tags(self, filepath, future):
+        if not future.done():
+            self.root.after(SCAN_POLL_MS, self.poll_all_tags, filepath, future)
+            return
+        if self.all_tags_request is not None and self.all_tags_request[1] is future:
+            self.all_tags_request = None
+        if future.cancelled():
+            return
+        try:
+            tags = future.result()
+        except Exception as e:
+            error = (getattr(e, 'stderr', None) or str(e)).strip()
+            tags = OrderedDict([('FileName', os.path.basename(filepath)), ('Error', error)])
+        self.all_tags[filepath] = tags
+        while len(self.all_tags) > ALL_TAGS_CACHE_SIZE:
+            self.all_tags.popitem(last=False)
+        if self.all_tags_var.get() and filepath == self.current_path():
+            self.update_table(tags)
+
+    def current_path(self):
+        if not self.image_count():
+            return None
+        if self.window is not None:
+            return self.window.paths[self.current_index]
+        return self.image_paths[self.image_position(self.current_index)]
 
     def select_file(self):
         filetypes = (
@@ -145,62 +240,409 @@ class ImageInfoViewer:
         if filepath:
             info = self.get_image_info(filepath)
             if info:
+                self.cancel_scan()
+                self.close_window()
+                self.reset_search(SearchIndex(metadata.FIELD_NAMES))
                 self.images_info = [info]
+                self.image_paths = [os.path.abspath(filepath)]
+                self.image_order = [0]
+                self.index.add(0, info)
+                self.reset_folder()
                 self.current_index = 0
                 self.update_display()
 
     def select_folder(self):
         folder_path = filedialog.askdirectory()
         if folder_path:
-            self.images_info = []
-            supported_formats = {'.jpg', '.jpeg', '.gif', '.tif', '.bmp', '.png', '.pcx'}
-            
-            for filename in os.listdir(folder_path):
-                if any(filename.lower().endswith(fmt) for fmt in supported_formats):
-                    filepath = os.path.join(folder_path, filename)
-                    info = self.get_image_info(filepath)
-                    if info:
-                        self.images_info.append(info)
-            
-            if self.images_info:
-                self.current_index = 0
-                self.update_display()
+            recursive = self.recursive_var.get()
+            # Any snapshot still running belongs to the previous folder
+            self.reset_folder()
+            if self.lazy_var.get():
+                self.start_window(metadata.list_images(folder_path, recursive))
             else:
-                messagebox.showinfo("Info", "No supported image files found in the selected folder")
+                # Taken before extraction, so changes made during the scan
+                # show up in the next rescan
+                folder = (folder_path, recursive)
+                self.snapshot_future = self.snapshot_executor.submit(snapshot.take, folder_path, recursive)
+                self.root.after(SCAN_POLL_MS, self.poll_open, self.snapshot_future, folder)
+
+    def reset_folder(self):
+        # Forgets the watched folder; pending snapshots are ignored when done
+        self.folder = None
+        self.snapshot = {}
+        self.snapshot_future = None
+        self.last_rescan = None
+
+    def poll_open(self, future, folder):
+        if not future.done():
+            self.root.after(SCAN_POLL_MS, self.poll_open, future, folder)
+            return
+        if future is not self.snapshot_future:
+            # Another folder or file was opened in the meantime
+            return
+        self.snapshot_future = None
+        try:
+            folder_snapshot = future.result()
+        except OSError as e:
+            messagebox.showerror("Error", f"Error reading folder: {str(e)}")
+            return
+        self.start_scan(list(folder_snapshot))
+        self.folder = folder
+        self.snapshot = folder_snapshot
+
+    def start_scan(self, filepaths):
+        self.cancel_scan()
+        self.close_window()
+        self.reset_search(SearchIndex(metadata.FIELD_NAMES))
+        self.images_info = []
+        self.image_paths = []
+        self.image_order = []
+        self.scan_order = {filepath: i for i, filepath in enumerate(filepaths)}
+        self.next_order = len(filepaths)
+        self.last_rescan = None
+        self.current_index = 0
+        self.update_table(None)
+        self.update_display()
+        self.start_scanner(filepaths)
+
+    def start_scanner(self, filepaths, incremental=False):
+        self.incremental = incremental
+        self.scanner = FolderScanner(filepaths, self.pool.extract, self.cache,
+                                     workers=self.pool.size, batch_size=self.batch_size).start()
+        self.progress.config(maximum=max(len(filepaths), 1), value=0)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.root.after(SCAN_POLL_MS, self.poll_scan)
 
-    def update_display(self):
-        if self.images_info:
-            self.update_table(self.images_info[self.current_index])
-            self.page_label.config(text=f"Image {self.current_index + 1} of {len(self.images_info)}")
+    def add_image(self, filepath, info, order):
+        # Keep directory order even though batches finish out of order
+        position = bisect(self.image_order, order)
+        if position and self.image_order[position - 1] == order:
+            # Re-extracted after a change: update in place
+            self.images_info[position - 1] = info
+            self.index.add(order, info)
+            return
+        self.image_order.insert(position, order)
+        self.images_info.insert(position, info)
+        self.image_paths.insert(position, filepath)
+        self.index.add(order, info)
+        if self.search_view is None and position <= self.current_index and len(self.images_info) > 1:
+            self.current_index += 1
+
+    def poll_scan(self):
+        scanner = self.scanner
+        if scanner is None:
+            return
+
+        results = scanner.drain()
+        unreadable = []
+        for filepath, info, error in results:
+            if info:
+                self.add_image(filepath, info, self.scan_order[filepath])
+            elif self.incremental:
+                unreadable.append(filepath)
+        if unreadable:
+            # Modified files that can no longer be read
+            self.remove_images(unreadable, forget=False)
+        if results:
+            self.progress.config(value=scanner.processed)
+            if self.search_text and (scanner.finished or
+                                     time.monotonic() - self.search_refreshed > SEARCH_REFRESH_SECONDS):
+                self.refresh_search()
+            self.update_display()
+            self.update_status()
+
+        if scanner.finished:
+            self.finish_scan()
+        else:
+            self.root.after(SCAN_POLL_MS, self.poll_scan)
+
+    def cancel_scan(self):
+        if self.scanner is not None:
+            self.scanner.cancel()
+            self.finish_scan()
+
+    def finish_scan(self):
+        scanner, self.scanner = self.scanner, None
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_status(scanner)
+
+        if scanner.errors and not (self.incremental and self.watch_var.get()):
+            lines = [f"{os.path.basename(filepath)}: {error}" for filepath, error in scanner.errors[:10]]
+            if len(scanner.errors) > 10:
+                lines.append(f"... and {len(scanner.errors) - 10} more")
+            messagebox.showwarning("Warning", f"Could not read metadata for {len(scanner.errors)} files:\n"
+                                              + "\n".join(lines))
+        if not self.images_info and not scanner.cancelled.is_set() and not self.incremental:
+            messagebox.showinfo("Info", "No supported image files found in the selected folder")
+
+    def remove_images(self, filepaths, forget=True):
+        # Drops images, staying on the current image or the one that took its place
+        removed = {self.scan_order[filepath] for filepath in filepaths if filepath in self.scan_order}
+        if forget:
+            for filepath in filepaths:
+                self.scan_order.pop(filepath, None)
+        if not removed:
+            return
+        current = self.current_order()
+        keep = [i for i, order in enumerate(self.image_order) if order not in removed]
+        self.image_order = [self.image_order[i] for i in keep]
+        self.images_info = [self.images_info[i] for i in keep]
+        self.image_paths = [self.image_paths[i] for i in keep]
+        for order in removed:
+            self.index.remove(order)
+
+        orders = self.image_order
+        if self.search_view is not None:
+            self.search_view = [order for order in self.search_view if order not in removed]
+            orders = self.search_view
+        if current is not None:
+            self.current_index = min(bisect_left(orders, current), max(len(orders) - 1, 0))
+
+    def rescan(self, quiet=False):
+        # Snapshot is taken off the Tk thread; only changed files are extracted
+        if self.folder is None or self.window is not None:
+            if not quiet:
+                messagebox.showerror("Error", "Rescan needs a folder scanned with Lazy mode off")
+            return
+        if self.scanner is not None or self.snapshot_future is not None:
+            return
+        folder, recursive = self.folder
+        self.snapshot_future = self.snapshot_executor.submit(snapshot.take, folder, recursive)
+        self.root.after(SCAN_POLL_MS, self.poll_rescan, self.snapshot_future)
+
+    def poll_rescan(self, future):
+        if not future.done():
+            self.root.after(SCAN_POLL_MS, self.poll_rescan, future)
+            return
+        if future is not self.snapshot_future:
+            # Another folder or file was opened in the meantime
+            return
+        self.snapshot_future = None
+        try:
+            new_snapshot = future.result()
+        except OSError as e:
+            self.watch_var.set(False)
+            self.toggle_watch()
+            messagebox.showerror("Error", f"Error rescanning folder: {str(e)}")
+            return
+
+        added, modified, removed = snapshot.diff(self.snapshot, new_snapshot)
+        self.snapshot = new_snapshot
+        self.last_rescan = (len(added), len(modified), len(removed))
+        for filepath in removed:
+            self.cache.discard(filepath)
+        self.remove_images(removed)
+        for filepath in added:
+            self.scan_order[filepath] = self.next_order
+            self.next_order += 1
+        if added or modified:
+            self.start_scanner(added + modified, incremental=True)
+        self.update_display()
+        self.update_status()
+
+    def toggle_watch(self):
+        if self.watch_job is not None:
+            self.root.after_cancel(self.watch_job)
+            self.watch_job = None
+        if self.watch_var.get():
+            self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.watch_tick)
+
+    def watch_tick(self):
+        self.watch_job = None
+        self.rescan(quiet=True)
+        if self.watch_var.get():
+            self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.watch_tick)
+
+    def run_search(self):
+        text = self.search_entry.get().strip()
+        if not text:
+            self.clear_search()
+            return
+        if self.window is not None:
+            messagebox.showerror("Error", "Search needs a full folder scan, turn off Lazy mode")
+            return
+        try:
+            view = self.index.search(text)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid search: {str(e)}")
+            return
+        self.search_text = text
+        self.show_view(view)
+        if not view and self.scanner is None:
+            messagebox.showinfo("Info", "No images match the search")
+
+    def refresh_search(self):
+        self.show_view(self.index.search(self.search_text))
+
+    def show_view(self, view):
+        # Switches to the matching images, staying on the current one if it matches
+        order = self.current_order()
+        self.search_view = view
+        self.search_refreshed = time.monotonic()
+        self.current_index = min(bisect_left(view, order), max(len(view) - 1, 0)) if order is not None else 0
+        self.update_display()
+        self.update_status()
+
+    def clear_search(self):
+        order = self.current_order()
+        self.reset_search()
+        self.search_entry.delete(0, tk.END)
+        if order is not None:
+            self.current_index = bisect_left(self.image_order, order)
+        self.update_display()
+        self.update_status()
+
+    def reset_search(self, index=None):
+        self.search_text = ""
+        self.search_view = None
+        if index is not None:
+            self.index = index
+
+    def image_position(self, index):
+        # Position in images_info of the index-th image being navigated
+        if self.search_view is None:
+            return index
+        return bisect_left(self.image_order, self.search_view[index])
+
+    def current_order(self):
+        if self.window is not None or not self.image_count():
+            return None
+        return self.image_order[self.image_position(self.current_index)]
+
+    def start_window(self, filepaths):
+        self.cancel_scan()
+        self.close_window()
+        self.reset_search(SearchIndex(metadata.FIELD_NAMES))
+        self.images_info = []
+        self.image_paths = filepaths
+        self.current_index = 0
+        self.window = MetadataWindow(filepaths, self.pool.submit, self.cache)
+        self.update_table(None)
+        if not filepaths:
+            messagebox.showinfo("Info", "No supported image files found in the selected folder")
+        self.update_display()
+
+    def close_window(self):
+        if self.window is not None:
+            self.window.cancel()
+            self.window = None
+            self.image_paths = []
+
+    def show_window_image(self, direction=1):
+        # Shows what is loaded for the current image and fetches around it
+        window = self.window
+        window.request(self.current_index, direction)
+        self.update_window_table()
+        if window.pending and not self.window_polling:
+            self.window_polling = True
+            self.root.after(SCAN_POLL_MS, self.poll_window)
+        self.update_status()
+
+    def update_window_table(self):
+        entry = self.window.get(self.current_index)
+        if entry is not None and entry[0] is not None:
+            self.show_info(entry[0])
+            return
+        info = OrderedDict([('FileName', os.path.basename(self.window.paths[self.current_index]))])
+        if entry is None:
+            info['Status'] = "Loading..."
+        else:
+            info['Error'] = entry[1]
+        self.show_info(info)
+
+    def poll_window(self):
+        window = self.window
+        if window is None:
+            self.window_polling = False
+            return
+        available = window.poll()
+        if window.paths[self.current_index] in available:
+            self.update_window_table()
+        if available:
+            self.update_status()
+        if window.pending:
+            self.root.after(SCAN_POLL_MS, self.poll_window)
+        else:
+            self.window_polling = False
+
+    def image_count(self):
+        if self.window is not None:
+            return len(self.window)
+        if self.search_view is not None:
+            return len(self.search_view)
+        return len(self.images_info)
+
+    def update_status(self, scanner=None):
+        scanner = scanner or self.scanner
+        stats = self.cache.stats()
+        text = (f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['evictions']} evictions, {stats['entries']} entries")
+        if self.window is not None:
+            window = self.window.stats()
+            text = (f"{window['files']} files, {window['loaded']} loaded, "
+                    f"{window['pending']} loading. " + text)
+        if self.search_view is not None:
+            text = f"{len(self.search_view)} of {len(self.images_info)} images match. " + text
+        if self.last_rescan is not None:
+            text = "Rescan: {} added, {} modified, {} removed. ".format(*self.last_rescan) + text
+        if scanner is not None:
+            state = "cancelled" if scanner.cancelled.is_set() else "scanned"
+            text = (f"{scanner.processed} of {scanner.total} files {state}, "
+                    f"{len(scanner.errors)} errors. " + text)
+            workers = self.pool.stats()
+            running = sum(1 for worker in workers if worker['running'])
+            restarts = sum(worker['restarts'] for worker in workers)
+            text += f". ExifTool: {running} of {self.pool.size} processes, {restarts} restarts"
+        self.status_label.config(text=text)
+
+    def update_display(self, direction=1):
+        count = self.image_count()
+        if count:
+            if self.window is not None:
+                self.show_window_image(direction)
+            else:
+                self.show_info(self.images_info[self.image_position(self.current_index)])
+            self.page_label.config(text=f"Image {self.current_index + 1} of {count}")
             
             self.prev_button.config(state=tk.NORMAL if self.current_index > 0 else tk.DISABLED)
-            self.next_button.config(state=tk.NORMAL if self.current_index < len(self.images_info) - 1 else tk.DISABLED)
+            self.next_button.config(state=tk.NORMAL if self.current_index < count - 1 else tk.DISABLED)
+        else:
+            self.page_label.config(text="")
+            self.prev_button.config(state=tk.DISABLED)
+            self.next_button.config(state=tk.DISABLED)
 
     def prev_image(self):
         if self.current_index > 0:
             self.current_index -= 1
-            self.update_display()
+            self.update_display(direction=-1)
 
     def next_image(self):
-        if self.current_index < len(self.images_info) - 1:
+        if self.current_index < self.image_count() - 1:
             self.current_index += 1
             self.update_display()
 
     def jump_to_page(self):
         try:
             page = int(self.page_entry.get())
-            if 1 <= page <= len(self.images_info):
+            if 1 <= page <= self.image_count():
+                direction = 1 if page - 1 >= self.current_index else -1
                 self.current_index = page - 1
-                self.update_display()
+                self.update_display(direction)
             else:
                 messagebox.showerror("Error", "Invalid page number")
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid number")
 
-    def __del__(self):
-        # Clean up ExifTool
-        if hasattr(self, 'et'):
-            self.et.terminate()
+    def on_close(self):
+        # Stop scan workers before their exiftool processes go away
+        self.watch_var.set(False)
+        self.toggle_watch()
+        self.cancel_scan()
+        self.close_window()
+        self.snapshot_executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.close()
+        self.cache.close()
+        self.root.destroy()
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Persistent cache of get_image_info results, keyed by path and validated
+# against the file's size and modification time. Entries are evicted least
+# recently used first once the cache grows past max_entries.
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "lab2", "metadata.sqlite3")
+DEFAULT_MAX_ENTRIES = 500_000
+# Bumped whenever the shape of the cached info changes
+SCHEMA_VERSION = 2
+
+# Access times of cache hits are written back in batches of this size
+TOUCH_BATCH = 1000
+
+
+def file_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class MetadataCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.pending_touches = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None or int(row[0]) != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS entries")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)",
+                                  (str(SCHEMA_VERSION),))
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                                     path TEXT PRIMARY KEY,
+                                     size INTEGER NOT NULL,
+                                     mtime_ns INTEGER NOT NULL,
+                                     info TEXT NOT NULL,
+                                     last_access REAL NOT NULL)""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access "
+                              "ON entries (last_access)")
+        self.count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, path, key=None):
+        # Returns the cached info, or None if missing or stale
+        try:
+            size, mtime_ns = key or file_key(path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime_ns, info FROM entries WHERE path = ?",
+                                    (path,)).fetchone()
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.pending_touches.append((time.time(), path))
+            if len(self.pending_touches) >= TOUCH_BATCH:
+                self._flush_touches()
+        return OrderedDict(json.loads(row[2]))
+
+    def put(self, path, info, key=None):
+        try:
+            size, mtime_ns = key or file_key(path)
+        except OSError:
+            return
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, json.dumps(list(info.items())), time.time()))
+            self.count += cursor.rowcount
+            if self.count > self.max_entries:
+                self._evict()
+
+    def discard(self, path):
+        with self.lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+            self.count -= cursor.rowcount
+
+    def _flush_touches(self):
+        if self.pending_touches:
+            with self.conn:
+                self.conn.executemany("UPDATE entries SET last_access = ? WHERE path = ?",
+                                      self.pending_touches)
+            self.pending_touches = []
+
+    def _evict(self):
+        # Re-count first: INSERT OR REPLACE reports a row even when replacing
+        self._flush_touches()
+        self.count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = self.count - self.max_entries
+        if excess > 0:
+            self.conn.execute("""DELETE FROM entries WHERE path IN (
+                                     SELECT path FROM entries ORDER BY last_access LIMIT ?)""",
+                              (excess,))
+            self.evictions += excess
+            self.count -= excess
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self.count,
+        }
+
+    def close(self):
+        with self.lock:
+            self._flush_touches()
+            self.conn.close()
@@ -0,0 +1,129 @@
+import queue
+from collections import OrderedDict
+
+# Lazy metadata for paging through large folders. Only the file list is
+# known up front; metadata is fetched for the image being shown plus a
+# prefetch window in the direction of travel, and kept in a bounded LRU.
+# Fetches run on the exiftool pool and completed results are handed back
+# through a queue, so all state is only touched from the Tk main loop.
+
+DEFAULT_CAPACITY = 2048
+DEFAULT_PREFETCH = 32
+
+
+class MetadataWindow:
+    def __init__(self, paths, submit, cache=None, capacity=DEFAULT_CAPACITY,
+                 prefetch=DEFAULT_PREFETCH):
+        # submit(paths) must return a Future of [(path, info, error)]
+        self.paths = list(paths)
+        self.submit = submit
+        self.cache = cache
+        self.capacity = capacity
+        self.prefetch = prefetch
+
+        self.loaded = OrderedDict()  # path -> (info, error), oldest first
+        self.pending = {}  # path -> Future
+        self.completed = queue.Queue()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+    def get(self, index):
+        # (info, error) for a loaded image, None while it is still loading
+        entry = self.loaded.get(self.paths[index])
+        if entry is not None:
+            self.loaded.move_to_end(self.paths[index])
+        return entry
+
+    def request(self, index, direction=1):
+        # Loads index first, then the next images in the direction of travel
+        step = 1 if direction >= 0 else -1
+        stop = min(max(index + step * (self.prefetch + 1), -1), len(self.paths))
+        wanted = [self.paths[i] for i in range(index, stop, step)]
+
+        # Queued prefetches that fell out of the window are not needed anymore
+        keep = set(wanted)
+        batches = {}
+        for path, future in self.pending.items():
+            batches.setdefault(future, []).append(path)
+        for future, paths in batches.items():
+            if keep.isdisjoint(paths) and future.cancel():
+                for path in paths:
+                    del self.pending[path]
+
+        missing = []
+        for path in wanted:
+            if path in self.loaded:
+                self.loaded.move_to_end(path)
+                self.hits += 1
+            elif path not in self.pending:
+                info = self.cache.get(path) if self.cache else None
+                if info is None:
+                    missing.append(path)
+                else:
+                    self._store(path, info, None)
+                    self.hits += 1
+        self.misses += len(missing)
+
+        # The shown image goes in its own batch so it is not held up by prefetching
+        if missing and missing[0] == wanted[0]:
+            self._fetch(missing[:1])
+            missing = missing[1:]
+        if missing:
+            self._fetch(missing)
+
+    def _fetch(self, paths):
+        future = self.submit(paths)
+        for path in paths:
+            self.pending[path] = future
+        future.add_done_callback(lambda done: self.completed.put((paths, done)))
+
+    def poll(self):
+        # Stores finished fetches, returns the paths that became available
+        available = set()
+        while True:
+            try:
+                paths, future = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(path, None, str(e)) for path in paths]
+            for path, info, error in results:
+                if self.pending.get(path) is not future:
+                    continue
+                del self.pending[path]
+                if info and self.cache:
+                    self.cache.put(path, info)
+                self._store(path, info, error)
+                available.add(path)
+        return available
+
+    def _store(self, path, info, error):
+        self.loaded[path] = (info, error)
+        self.loaded.move_to_end(path)
+        while len(self.loaded) > self.capacity:
+            self.loaded.popitem(last=False)
+            self.evictions += 1
+
+    def cancel(self):
+        for future in set(self.pending.values()):
+            future.cancel()
+        self.pending.clear()
+
+    def stats(self):
+        return {
+            "files": len(self.paths),
+            "loaded": len(self.loaded),
+            "pending": len(self.pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
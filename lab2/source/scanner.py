@@ -0,0 +1,94 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Background folder scanning. Batches of files are processed on worker
+# threads and every result is pushed onto a queue; the Tk main loop drains
+# the queue with after() callbacks, so the UI never blocks on exiftool.
+
+
+class FolderScanner:
+    def __init__(self, paths, extract, cache=None, workers=1, batch_size=64):
+        # extract(batch) must yield (path, info, error) for every path given
+        self.paths = list(paths)
+        self.extract = extract
+        self.cache = cache
+        self.workers = workers
+        self.batch_size = batch_size
+
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.executor = None
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+
+        self.total = len(self.paths)
+        self.processed = 0
+        self.errors = []
+
+    def start(self):
+        batches = [self.paths[i:i + self.batch_size]
+                   for i in range(0, len(self.paths), self.batch_size)]
+        self.pending = len(batches)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix="folder-scan")
+        for batch in batches:
+            self.executor.submit(self._run_batch, batch)
+        self.executor.shutdown(wait=False)
+        return self
+
+    def _run_batch(self, batch):
+        reported = set()
+        try:
+            if self.cancelled.is_set():
+                return
+            missing = []
+            for path in batch:
+                info = self.cache.get(path) if self.cache else None
+                if info is None:
+                    missing.append(path)
+                else:
+                    self._report(reported, path, info, None)
+            if missing and not self.cancelled.is_set():
+                for path, info, error in self.extract(missing):
+                    if info and self.cache:
+                        self.cache.put(path, info)
+                    self._report(reported, path, info, error)
+        except Exception as e:
+            # Whatever was not reported yet fails with the batch error
+            for path in batch:
+                if path not in reported:
+                    self._report(reported, path, None, str(e))
+        finally:
+            with self.pending_lock:
+                self.pending -= 1
+
+    def _report(self, reported, path, info, error):
+        reported.add(path)
+        self.results.put((path, info, error))
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def drain(self, limit=1000):
+        # Results collected since the last call, at most limit of them
+        items = []
+        while len(items) < limit:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                break
+            path, info, error = item
+            if error:
+                self.errors.append((path, error))
+            items.append(item)
+        self.processed += len(items)
+        return items
+
+    @property
+    def finished(self):
+        if self.cancelled.is_set():
+            return self.results.empty()
+        return self.pending == 0 and self.results.empty()
@@ -0,0 +1,227 @@
+import operator
+import re
+from bisect import bisect_left, bisect_right
+
+# In-memory index over extracted metadata. Categorical fields get inverted
+# indexes (value -> ids), numeric fields sorted (value, id) lists searched
+# with bisect. A conjunctive query intersects the id sets of its indexed
+# conditions, smallest first, and checks any others record by record.
+
+CATEGORICAL_FIELDS = {'FileType', 'ColorType', 'Compression', 'ResolutionUnit', 'ColorSpace',
+                      'BitDepth', 'BitsPerSample', 'BitsPerPixel', 'ColorComponents',
+                      'SamplesPerPixel', 'ColorResolutionDepth'}
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '~': lambda value, text: text in value,
+}
+
+QUERY_TERM = re.compile(r'\s*(\w+)\s*(<=|>=|!=|=|<|>|~)\s*("[^"]*"|[^\s,<>=!~"]+)\s*(?:,|\band\b)?', re.I)
+
+
+def _key(value):
+    # Text matches ignoring case and padding (ICC colour spaces are "RGB ");
+    # 300 and 300.0 are the same key
+    return value.strip().casefold() if isinstance(value, str) else value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def predicate(field, op, value):
+    # Record test for one condition, following the same rules as the indexes.
+    # Text compares case-insensitively, and with numbers as text. A number
+    # only matches numbers: against text such as BitsPerSample "8 8 8" it is
+    # never equal, less or greater, only unequal.
+    text = _key(str(value))
+    if op == '~':
+        def matches(info):
+            actual = info.get(field)
+            return actual is not None and text in str(actual).casefold()
+        return matches
+
+    compare = OPERATORS[op]
+    number = _is_number(value)
+
+    def matches(info):
+        actual = info.get(field)
+        if actual is None:
+            return False
+        if number:
+            return compare(actual, value) if _is_number(actual) else op == '!='
+        return compare(_key(str(actual)), text)
+    return matches
+
+
+# Past this ratio of sizes, checking the few remaining records directly is
+# cheaper than materializing another id set to intersect with
+FILTER_RATIO = 16
+
+
+class SortedIndex:
+    def __init__(self):
+        self.values = []
+        self.ids = []
+        self.pending_values = []
+        self.pending_ids = []
+        self.stale = False
+
+    def add(self, value, doc_id):
+        # New entries are sorted in on the next lookup, not one by one
+        self.pending_values.append(value)
+        self.pending_ids.append(doc_id)
+
+    def _merge(self):
+        if self.pending_ids:
+            self._sort(self.values + self.pending_values, self.ids + self.pending_ids)
+
+    def _sort(self, values, ids):
+        # Sorting positions by value avoids building (value, id) tuples, and
+        # the already sorted prefix is a single run for list.sort
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.values = [values[i] for i in order]
+        self.ids = [ids[i] for i in order]
+        self.pending_values = []
+        self.pending_ids = []
+
+    def rebuild(self, values, ids):
+        self._sort(values, ids)
+        self.stale = False
+
+    def bounds(self, op, value):
+        # Slice of ids whose value satisfies op, None for unsupported ops
+        self._merge()
+        if op == '=':
+            return bisect_left(self.values, value), bisect_right(self.values, value)
+        if op == '<':
+            return 0, bisect_left(self.values, value)
+        if op == '<=':
+            return 0, bisect_right(self.values, value)
+        if op == '>':
+            return bisect_right(self.values, value), len(self.values)
+        if op == '>=':
+            return bisect_left(self.values, value), len(self.values)
+        return None
+
+
+class SearchIndex:
+    def __init__(self, fields=()):
+        # fields are searchable before any record has them
+        self.records = {}  # doc id -> info
+        self.inverted = {}  # field -> value key -> set of ids
+        self.sorted = {}  # field -> SortedIndex
+        self.fields = {field.lower(): field for field in fields}  # lower-case name -> field name
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, doc_id, info):
+        if doc_id in self.records:
+            self.remove(doc_id)
+        self.records[doc_id] = info
+        for field, value in info.items():
+            if value is None:
+                continue
+            self.fields.setdefault(field.lower(), field)
+            if field in CATEGORICAL_FIELDS:
+                self.inverted.setdefault(field, {}).setdefault(_key(value), set()).add(doc_id)
+            if _is_number(value):
+                self.sorted.setdefault(field, SortedIndex()).add(value, doc_id)
+
+    def remove(self, doc_id):
+        info = self.records.pop(doc_id, None)
+        if info is None:
+            return
+        for field, value in info.items():
+            ids = self.inverted.get(field, {}).get(_key(value))
+            if ids is not None:
+                ids.discard(doc_id)
+            if field in self.sorted and _is_number(value):
+                # Deleting from the middle of the lists is O(n) per id, so
+                # the index is rebuilt once before its next use instead
+                self.sorted[field].stale = True
+
+    def parse(self, text):
+        # "FileType=TIFF XResolution>=300 ImageWidth>4000" -> [(field, op, value)]
+        conditions = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = QUERY_TERM.match(text, position)
+            if not match:
+                raise ValueError(f"Cannot parse query near: {text[position:]}")
+            name, op, value = match.groups()
+            field = self.fields.get(name.lower())
+            if field is None:
+                raise ValueError(f"Unknown field: {name}")
+            if value.startswith('"'):
+                value = value[1:-1]
+            else:
+                try:
+                    value = float(value)
+                    value = int(value) if value.is_integer() else value
+                except ValueError:
+                    pass
+            conditions.append((field, op, value))
+            position = match.end()
+        if not conditions:
+            raise ValueError("Empty query")
+        return conditions
+
+    def _candidates(self, field, op, value):
+        # (estimated size, ids producer) for an indexed condition, else None
+        if op == '=' and field in self.inverted:
+            keys = self.inverted[field]
+            ids = keys.get(_key(value), set())
+            if not _is_number(value):
+                # Text also equals numbers that print the same
+                numbers = [keys[key] for key in keys if _is_number(key) and _key(str(key)) == _key(value)]
+                if numbers:
+                    ids = ids.union(*numbers)
+            return len(ids), lambda: ids
+        index = self.sorted.get(field)
+        if index is not None and _is_number(value):
+            if index.stale:
+                ids = [doc_id for doc_id, info in self.records.items() if _is_number(info.get(field))]
+                index.rebuild([self.records[doc_id][field] for doc_id in ids], ids)
+            bounds = index.bounds(op, value)
+            if bounds is not None:
+                lo, hi = bounds
+                return max(hi - lo, 0), lambda: index.ids[lo:hi]
+        return None
+
+    def query(self, conditions):
+        # Sorted ids of records matching every condition
+        planned = []
+        remaining = []
+        for condition in conditions:
+            candidates = self._candidates(*condition)
+            if candidates is None:
+                remaining.append(condition)
+            else:
+                planned.append((candidates[0], candidates[1], condition))
+        planned.sort(key=lambda plan: plan[0])
+        if planned:
+            ids = set(planned[0][1]())
+        else:
+            ids = self.records.keys()
+        for size, producer, condition in planned[1:]:
+            if size > FILTER_RATIO * len(ids):
+                remaining.append(condition)
+            else:
+                ids = ids.intersection(producer())
+
+        records = self.records
+        for condition in remaining:
+            matches = predicate(*condition)
+            ids = [doc_id for doc_id in ids if matches(records[doc_id])]
+        return sorted(ids)
+
+    def search(self, text):
+        return self.query(self.parse(text))
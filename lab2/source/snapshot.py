@@ -0,0 +1,32 @@
+import metadata
+
+# Directory snapshots for watched folders: path -> (size, mtime_ns) of every
+# supported file. Diffing two snapshots gives the added, modified and removed
+# files, so a rescan costs a directory walk plus one stat per file and only
+# the changed files go back through metadata extraction.
+
+
+def take(folder, recursive=False):
+    snapshot = {}
+    for entry in metadata.iter_images(folder, recursive):
+        try:
+            stat = entry.stat()
+        except OSError:
+            # Removed while walking
+            continue
+        snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def diff(old, new):
+    # (added, modified, removed) paths, added and modified in walk order
+    added = []
+    modified = []
+    for path, key in new.items():
+        previous = old.get(path)
+        if previous is None:
+            added.append(path)
+        elif previous != key:
+            modified.append(path)
+    removed = [path for path in old if path not in new]
+    return added, modified, removed
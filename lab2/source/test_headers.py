@@ -0,0 +1,20 @@
+import struct
+import numpy as np
+from PIL import Image
+import headers
+
+
+def test_pcx_resolution_is_low_byte(tmp_path):
+    # exiftool reads the 16-bit PCX DPI fields as int8u: 300 dpi -> 44
+    path = tmp_path / "scan.pcx"
+    Image.fromarray(np.zeros((20, 30), dtype=np.uint8)).save(path)
+    data = bytearray(path.read_bytes())
+    struct.pack_into('<HH', data, 12, 300, 150)
+    path.write_bytes(data)
+
+    fields = headers.read_header(str(path))
+    assert fields['File:FileType'] == 'PCX'
+    assert fields['File:ImageWidth'] == 30
+    assert fields['File:ImageHeight'] == 20
+    assert fields['File:XResolution'] == 44
+    assert fields['File:YResolution'] == 150
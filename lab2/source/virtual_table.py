@@ -0,0 +1,96 @@
+# Property/value table that only materializes the rows on screen. The rows
+# live in a plain list and a fixed pool of Treeview items is refilled as the
+# view scrolls, so switching to a file with thousands of tags costs the same
+# as one with eight. The Treeview's own scrolling is replaced by a separate
+# scrollbar driven from the row list.
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+def format_value(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(map(str, value))
+    return value
+
+
+class VirtualTable:
+    def __init__(self, tree, scrollbar, rows=25):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = []
+        self.top = 0
+        self.items = []
+        self.attached = 0
+
+        scrollbar.config(command=self.yview)
+        tree.bind("<Configure>", self.on_configure)
+        tree.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll(3))
+        tree.bind("<Prior>", lambda event: self.scroll(-len(self.items)))
+        tree.bind("<Next>", lambda event: self.scroll(len(self.items)))
+        self.resize(rows)
+
+    def show(self, rows):
+        # rows: iterable of (property, value); only the visible ones are formatted
+        self.rows = list(rows)
+        self.top = 0
+        self.tree.selection_set(())
+        self.refresh()
+
+    def resize(self, count):
+        count = max(count, 1)
+        while len(self.items) < count:
+            item = self.tree.insert("", "end", values=("", ""))
+            self.tree.detach(item)
+            self.items.append(item)
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+        self.attached = min(self.attached, count)
+        self.refresh()
+
+    def on_configure(self, event):
+        # Pool size follows the widget height; the first row's bbox gives the
+        # heading and row heights once anything is on screen
+        bbox = self.tree.bbox(self.items[0]) if self.attached else None
+        if bbox:
+            heading, row_height = bbox[1], bbox[3]
+        else:
+            heading = row_height = DEFAULT_ROW_HEIGHT
+        count = (event.height - heading) // max(row_height, 1)
+        if count != len(self.items):
+            self.resize(count)
+
+    def scroll(self, amount):
+        self.top += amount
+        self.refresh()
+        return "break"
+
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = len(self.items) if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.refresh()
+
+    def refresh(self):
+        total = len(self.rows)
+        self.top = max(0, min(self.top, total - len(self.items)))
+        shown = min(len(self.items), total - self.top)
+
+        for i in range(shown):
+            key, value = self.rows[self.top + i]
+            self.tree.item(self.items[i], values=(key, format_value(value)))
+        # Items past the last row are detached rather than shown blank
+        for i in range(self.attached, shown):
+            self.tree.move(self.items[i], "", i)
+        if shown < self.attached:
+            self.tree.detach(*self.items[shown:self.attached])
+        self.attached = shown
+
+        if total:
+            self.scrollbar.set(self.top / total, (self.top + shown) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,170 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from PIL import Image
+import pipeline
+
+# Headless batch processing: applies a filter chain to every image under a
+# folder. Images are spread over a process pool with a bounded number in
+# flight, so a huge tree never queues more than a few decoded images.
+# Results go next to each input (name_processed.png) or, with --output, to
+# the same relative path in a mirror tree.
+#
+#   python batch.py scans/ --pipeline "median:size=5 | adaptive:window=31,method=sauvola"
+#   python batch.py scans/ --pipeline otsu:levels=2 --output results/ --workers 8
+
+IMAGE_FORMATS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.pcx'}
+DEFAULT_SUFFIX = "_processed"
+
+
+def find_images(folder, recursive=True, suffix=DEFAULT_SUFFIX, skip=None):
+	# Image paths in walk order, skipping results of an earlier run: files
+	# written next to their inputs, or the output tree if it is inside folder
+	skip = os.path.abspath(skip) if skip else None
+	for root, dirs, files in os.walk(folder):
+		dirs[:] = sorted(name for name in dirs if os.path.abspath(os.path.join(root, name)) != skip)
+		if not recursive:
+			dirs.clear()
+		for name in sorted(files):
+			stem, extension = os.path.splitext(name)
+			if extension.lower() in IMAGE_FORMATS and not (suffix and stem.endswith(suffix)):
+				yield os.path.join(root, name)
+
+
+def output_path(path, folder, output=None, suffix=DEFAULT_SUFFIX, extension=".png"):
+	stem = os.path.splitext(path)[0]
+	if output is None:
+		return stem + suffix + extension
+	return os.path.join(output, os.path.relpath(stem, folder) + extension)
+
+
+def assign_targets(paths, targets):
+	# Splits (path, target) pairs into jobs and errors for inputs whose
+	# target an earlier input already claimed (a.png and a.jpg both make
+	# a_processed.png), so no result is silently overwritten
+	claimed = {}
+	jobs = []
+	errors = []
+	for path, target in zip(paths, targets):
+		key = os.path.normcase(os.path.abspath(target))
+		if key in claimed:
+			errors.append((path, None, f"output {target} is already written for {claimed[key]}"))
+		else:
+			claimed[key] = path
+			jobs.append((path, target))
+	return jobs, errors
+
+
+def process_image(path, target, steps):
+	# (path, timings in seconds, error); runs in a worker process
+	timings = {}
+	start = time.perf_counter()
+	try:
+		img = np.array(Image.open(path).convert('L'))
+		timings["load"] = time.perf_counter() - start
+		result = pipeline.run(img, steps)
+		timings["filter"] = time.perf_counter() - start - timings["load"]
+		os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+		Image.fromarray(result).save(target)
+		timings["save"] = time.perf_counter() - start - timings["load"] - timings["filter"]
+	except (OSError, ValueError, Image.DecompressionBombError) as e:
+		return path, None, str(e)
+	except Exception as e:
+		# A failing filter only fails its own image
+		return path, None, f"{type(e).__name__}: {e}"
+	timings["total"] = time.perf_counter() - start
+	return path, timings, None
+
+
+def _result(future, path):
+	try:
+		return future.result()
+	except Exception as e:
+		# The worker process died (e.g. killed for running out of memory)
+		return path, None, f"{type(e).__name__}: {e}"
+
+
+def run_batch(jobs, steps, workers=None, in_flight=None):
+	# Yields process_image results for (path, target) jobs as they finish,
+	# at most in_flight queued. A dying worker breaks the pool: the images
+	# in flight are reported as errors and the rest go to a new pool.
+	workers = workers or os.cpu_count() or 1
+	if workers == 1:
+		for path, target in jobs:
+			yield process_image(path, target, steps)
+		return
+	in_flight = in_flight or 2 * workers
+	pool = ProcessPoolExecutor(max_workers=workers)
+	pending = {}
+	try:
+		for path, target in jobs:
+			if len(pending) >= in_flight:
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield _result(future, pending.pop(future))
+			try:
+				future = pool.submit(process_image, path, target, steps)
+			except BrokenProcessPool:
+				for future, pending_path in pending.items():
+					yield _result(future, pending_path)
+				pending.clear()
+				pool.shutdown()
+				pool = ProcessPoolExecutor(max_workers=workers)
+				future = pool.submit(process_image, path, target, steps)
+			pending[future] = path
+		for future, path in pending.items():
+			yield _result(future, path)
+	finally:
+		pool.shutdown()
+
+
+def print_report(results, elapsed, stream=sys.stdout):
+	width = max((len(path) for path, _, _ in results), default=10)
+	print(f"{'image':<{width}}{'load':>9}{'filter':>9}{'save':>9}{'total':>9}", file=stream)
+	for path, timings, error in sorted(results):
+		if error:
+			print(f"{path:<{width}}  error: {error}", file=stream)
+		else:
+			print(f"{path:<{width}}" + "".join(f"{timings[stage]:>9.3f}"
+			                                   for stage in ("load", "filter", "save", "total")), file=stream)
+	processed = sum(1 for _, timings, _ in results if timings)
+	busy = sum(timings["total"] for _, timings, _ in results if timings)
+	print(f"\n{processed} images in {elapsed:.2f} s ({processed / max(elapsed, 1e-9):.2f} images/s), "
+	      f"{len(results) - processed} errors, {busy:.2f} s of work", file=stream)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Apply a lab3 filter chain to every image in a folder")
+	parser.add_argument("folder")
+	parser.add_argument("--pipeline", required=True,
+	                    help=f"filter chain, e.g. \"median:size=5 | otsu:levels=2\"; filters: {', '.join(pipeline.STEPS)}")
+	parser.add_argument("--output", help="mirror tree for the results, instead of next to the inputs")
+	parser.add_argument("--suffix", default=DEFAULT_SUFFIX, help="added to result names next to the inputs")
+	parser.add_argument("--format", choices=["png", "tif", "bmp"], default="png")
+	parser.add_argument("--no-recursive", action="store_true", help="skip subfolders")
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	parser.add_argument("--in-flight", type=int, help="images queued at once, 2 per worker by default")
+	args = parser.parse_args()
+
+	try:
+		steps = pipeline.parse(args.pipeline)
+	except ValueError as e:
+		sys.exit(f"Error: {e}")
+	if not os.path.isdir(args.folder):
+		sys.exit(f"Error: not a folder: {args.folder}")
+
+	# Results of an earlier run next to the inputs are skipped in both modes
+	paths = list(find_images(args.folder, not args.no_recursive, args.suffix, args.output))
+	targets = [output_path(path, args.folder, args.output, args.suffix, "." + args.format) for path in paths]
+	jobs, results = assign_targets(paths, targets)
+	start = time.perf_counter()
+	for result in run_batch(jobs, steps, args.workers, args.in_flight):
+		results.append(result)
+		print(f"{len(results)}/{len(paths)}", end="\r", file=sys.stderr)
+	if results:
+		print(file=sys.stderr)
+	print_report(results, time.perf_counter() - start)
@@ -0,0 +1,190 @@
+import argparse
+import time
+import numpy as np
+from PIL import Image
+import filters
+
+# Timings of the lab3 filters against the original per-pixel loops, on a
+# synthetic image or a real one given with --image.
+
+
+BENCHMARKS = ["median", "otsu", "gradient", "adaptive"]
+
+
+def median_loop(img_array):
+	# The original ImageProcessor.apply_median_filter: 3x3, borders left at zero
+	height, width = img_array.shape
+	result = np.zeros((height, width), dtype=np.uint8)
+	for i in range(1, height-1):
+		for j in range(1, width-1):
+			neighborhood = []
+			for k in range(-1, 2):
+				for l in range(-1, 2):
+					neighborhood.append(img_array[i+k, j+l])
+			neighborhood.sort()
+			result[i, j] = neighborhood[4]
+	return result
+
+
+def otsu_loop(img_array):
+	# The original ImageProcessor.apply_histogram_threshold threshold search
+	histogram = [0] * 256
+	for pixel in img_array.flatten():
+		histogram[pixel] += 1
+	total_pixels = img_array.size
+	sum_all = sum(i * h for i, h in enumerate(histogram))
+	sum_background = 0
+	weight_background = 0
+	max_variance = 0
+	threshold = 0
+	for t in range(256):
+		weight_background += histogram[t]
+		if weight_background == 0:
+			continue
+		weight_foreground = total_pixels - weight_background
+		if weight_foreground == 0:
+			break
+		sum_background += t * histogram[t]
+		mean_background = sum_background / weight_background
+		mean_foreground = (sum_all - sum_background) / weight_foreground
+		variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+		if variance > max_variance:
+			max_variance = variance
+			threshold = t
+	return threshold
+
+
+def gradient_loop(img_array):
+	# The original ImageProcessor.apply_gradient_threshold Sobel loop, with
+	# its uint8 arithmetic
+	height, width = img_array.shape
+	gradient_x = np.zeros((height, width))
+	gradient_y = np.zeros((height, width))
+	for i in range(1, height-1):
+		for j in range(1, width-1):
+			gradient_x[i, j] = (img_array[i+1, j-1] + 2*img_array[i+1, j] + img_array[i+1, j+1]) - (img_array[i-1, j-1] + 2*img_array[i-1, j] + img_array[i-1, j+1])
+			gradient_y[i, j] = (img_array[i-1, j+1] + 2*img_array[i, j+1] + img_array[i+1, j+1]) - (img_array[i-1, j-1] + 2*img_array[i, j-1] + img_array[i+1, j-1])
+	return np.sqrt(gradient_x**2 + gradient_y**2)
+
+
+def adaptive_loop(img_array, window_size=15, c=2):
+	# The original ImageProcessor.apply_adaptive_threshold: np.mean per window
+	height, width = img_array.shape
+	result = np.zeros((height, width), dtype=np.uint8)
+	for i in range(height):
+		for j in range(width):
+			y_start = max(0, i - window_size//2)
+			y_end = min(height, i + window_size//2 + 1)
+			x_start = max(0, j - window_size//2)
+			x_end = min(width, j + window_size//2 + 1)
+			window = img_array[y_start:y_end, x_start:x_end]
+			local_mean = np.mean(window)
+			if img_array[i, j] > local_mean - c:
+				result[i, j] = 255
+	return result
+
+
+def make_image(width, height, seed=0):
+	# Smooth gradient with salt-and-pepper noise, like a noisy scan
+	rng = np.random.default_rng(seed)
+	y, x = np.mgrid[0:height, 0:width]
+	img = ((x * 255 // max(width - 1, 1) + y * 255 // max(height - 1, 1)) // 2).astype(np.uint8)
+	noise = rng.random((height, width))
+	img[noise < 0.05] = 0
+	img[noise > 0.95] = 255
+	return img
+
+
+def timed(func, *args):
+	start = time.perf_counter()
+	result = func(*args)
+	return result, time.perf_counter() - start
+
+
+def run_median(img, sizes, loop_pixels):
+	height, width = img.shape
+	print(f"Median filter, {width}x{height} ({img.size / 1e6:.1f} MP)")
+
+	# The loop is timed on a crop and scaled up, a full frame takes minutes
+	crop = img[:max(3, loop_pixels // width)]
+	reference, elapsed = timed(median_loop, crop)
+	vectorized = filters.median_filter(crop, 3)
+	assert (vectorized[1:-1, 1:-1] == reference[1:-1, 1:-1]).all()
+	print(f"{'loop (original)':<22}{3:>6}{elapsed * img.size / crop.size:>12.2f} s (estimated)")
+
+	for size in sizes:
+		results = {}
+		for method in ("window", "histogram"):
+			results[method], elapsed = timed(filters.median_filter, img, size, method)
+			print(f"{method:<22}{size:>6}{elapsed:>12.2f} s")
+		assert (results["window"] == results["histogram"]).all()
+
+
+def run_otsu(img, loop_pixels):
+	print(f"Otsu thresholding, {img.shape[1]}x{img.shape[0]}")
+	crop = img[:max(1, loop_pixels // img.shape[1])]
+	threshold, elapsed = timed(otsu_loop, crop)
+	assert threshold == filters.otsu_threshold(filters.histogram(crop))
+	print(f"{'loop (original)':<22}{1:>6}{elapsed * img.size / crop.size:>12.3f} s (estimated)")
+
+	hist, elapsed = timed(filters.histogram, img)
+	print(f"{'bincount histogram':<22}{'':>6}{elapsed:>12.3f} s")
+	for count in (1, 2, 3, 4):
+		thresholds, elapsed = timed(filters.multi_otsu_thresholds, hist, count)
+		print(f"{'otsu':<22}{count:>6}{elapsed:>12.3f} s  {thresholds}")
+
+
+def run_gradient(img, loop_pixels):
+	print(f"Gradients and edges, {img.shape[1]}x{img.shape[0]}")
+	crop = img[:max(3, loop_pixels // img.shape[1])]
+	with np.errstate(over="ignore"):
+		_, elapsed = timed(gradient_loop, crop)
+	print(f"{'loop (original)':<22}{'':>6}{elapsed * img.size / crop.size:>12.3f} s (estimated)")
+	for operator in filters.GRADIENT_OPERATORS:
+		_, elapsed = timed(filters.gradient_magnitude, img, operator)
+		print(f"{operator:<22}{'':>6}{elapsed:>12.3f} s")
+	(edges, _, _), elapsed = timed(filters.canny, img)
+	print(f"{'canny':<22}{'':>6}{elapsed:>12.3f} s  {edges.mean():.1%} edge pixels")
+
+
+def run_adaptive(img, windows, loop_pixels):
+	print(f"Adaptive thresholding, {img.shape[1]}x{img.shape[0]}")
+	crop = img[:max(1, loop_pixels // 10 // img.shape[1])]
+	reference, elapsed = timed(adaptive_loop, crop)
+	assert (reference == filters.adaptive_threshold(crop)).all()
+	print(f"{'loop (original)':<22}{15:>6}{elapsed * img.size / crop.size:>12.3f} s (estimated)")
+	for window in windows:
+		for method in filters.ADAPTIVE_METHODS:
+			_, elapsed = timed(filters.adaptive_threshold, img, window, 2, method)
+			print(f"{method:<22}{window:>6}{elapsed:>12.3f} s")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="lab3 filter benchmark")
+	# Checked by hand: argparse rejects an empty or list default against choices
+	parser.add_argument("filters", nargs="*", metavar="FILTER",
+	                    help=f"filters to time ({', '.join(BENCHMARKS)}), all by default")
+	parser.add_argument("--image", help="grayscale image to use instead of a synthetic one")
+	parser.add_argument("--size", type=int, nargs=2, default=[4000, 3000], metavar=("WIDTH", "HEIGHT"))
+	parser.add_argument("--median-sizes", type=int, nargs="+", default=[3, 5, 9, 15, 25])
+	parser.add_argument("--adaptive-windows", type=int, nargs="+", default=[15, 101])
+	parser.add_argument("--loop-pixels", type=int, default=200000,
+	                    help="pixels the original loops are timed on")
+	args = parser.parse_args()
+	unknown = [name for name in args.filters if name not in BENCHMARKS]
+	if unknown:
+		parser.error(f"invalid filter: {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})")
+	args.filters = args.filters or BENCHMARKS
+
+	if args.image:
+		img = np.array(Image.open(args.image).convert('L'))
+	else:
+		img = make_image(*args.size)
+	if "median" in args.filters:
+		run_median(img, args.median_sizes, args.loop_pixels)
+	if "otsu" in args.filters:
+		run_otsu(img, args.loop_pixels)
+	if "gradient" in args.filters:
+		run_gradient(img, args.loop_pixels)
+	if "adaptive" in args.filters:
+		run_adaptive(img, args.adaptive_windows, args.loop_pixels)
@@ -0,0 +1,391 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Vectorized filters behind the ImageProcessor buttons. Every function takes
+# and returns a 2-D uint8 array; borders are padded (reflected by default)
+# rather than left at zero.
+
+# Kernels up to this size use the sliding-window median, larger ones the
+# histogram median whose cost does not grow with the radius
+HISTOGRAM_MEDIAN_SIZE = 9
+
+# Upper bound on the window stack built per strip by the sliding-window median
+STRIP_BYTES = 64 * 1024 * 1024
+
+
+def _check_size(size):
+	if size < 1 or size % 2 == 0:
+		raise ValueError(f"Kernel size must be a positive odd number, got {size}")
+
+
+def median_filter(img, size=3, method="auto", border="reflect"):
+	# method: "window", "histogram" or "auto"; border: any np.pad mode
+	_check_size(size)
+	if method == "auto":
+		method = "window" if size <= HISTOGRAM_MEDIAN_SIZE else "histogram"
+	if method == "window":
+		return median_window(img, size, border)
+	if method == "histogram":
+		return median_histogram(img, size, border)
+	raise ValueError(f"Unknown median method: {method}")
+
+
+def _median3(a, b, c):
+	return np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+
+
+def median_3x3(img, border="reflect"):
+	# Sorting network over shifted views: sort each vertical triple, then the
+	# median is the median of (largest low, middle middle, smallest high) of
+	# three neighbouring columns. Only elementwise min/max, no window stack.
+	padded = np.pad(img, 1, mode=border)
+	top, middle, bottom = padded[:-2], padded[1:-1], padded[2:]
+	low = np.minimum(top, middle)
+	high = np.maximum(top, middle)
+	mid = np.maximum(low, np.minimum(high, bottom))
+	low = np.minimum(low, bottom)
+	high = np.maximum(high, bottom)
+	low = np.maximum(np.maximum(low[:, :-2], low[:, 1:-1]), low[:, 2:])
+	high = np.minimum(np.minimum(high[:, :-2], high[:, 1:-1]), high[:, 2:])
+	mid = _median3(mid[:, :-2], mid[:, 1:-1], mid[:, 2:])
+	return _median3(low, mid, high)
+
+
+def median_window(img, size=3, border="reflect"):
+	# Partial sort of every size x size neighbourhood at once, a strip of
+	# rows at a time so the window stack stays bounded
+	_check_size(size)
+	if size == 3:
+		return median_3x3(img, border)
+	radius = size // 2
+	padded = np.pad(img, radius, mode=border)
+	height, width = img.shape
+	result = np.empty_like(img)
+	middle = size * size // 2
+	strip = max(1, STRIP_BYTES // (size * size * max(width, 1) * img.itemsize))
+	for top in range(0, height, strip):
+		bottom = min(top + strip, height)
+		windows = sliding_window_view(padded[top:bottom + 2 * radius], (size, size))
+		windows = windows.reshape(bottom - top, width, size * size)
+		result[top:bottom] = np.partition(windows, middle, axis=-1)[..., middle]
+	return result
+
+
+def _window_sum(a, size):
+	# Sums of every size consecutive rows of a, built by doubling (sums of 1,
+	# 2, 4, ... rows). O(log size) whole-array additions measured faster than
+	# differencing a cumsum even at size 101.
+	count = len(a) - size + 1
+	result = None
+	offset = 0
+	span = 1
+	while size:
+		if size & 1:
+			part = a[offset:offset + count]
+			result = part.copy() if result is None else np.add(result, part, out=result)
+			offset += span
+		size >>= 1
+		if size:
+			a = a[:-span] + a[span:]
+			span *= 2
+	return result
+
+
+def median_histogram(img, size=3, border="reflect"):
+	# Huang's running histogram with Perreault's column histograms: one
+	# histogram per column is slid down the image a row at a time, so moving
+	# to the next row costs two updates per column whatever the radius, and
+	# kernel histograms are sums of adjacent column histograms. Histograms
+	# are two-level (16 coarse bins of 16): the coarse pass finds the bin
+	# holding the median, and only that bin's fine counts are summed.
+	_check_size(size)
+	if img.dtype != np.uint8:
+		raise ValueError("Histogram median needs an 8-bit image")
+	radius = size // 2
+	padded = np.pad(img, radius, mode=border)
+	height, width = img.shape
+	columns = np.arange(padded.shape[1])
+	pixels = np.arange(width)
+	fine = np.zeros((padded.shape[1], 256), dtype=np.int32)
+	coarse = np.zeros((padded.shape[1], 16), dtype=np.int32)
+	rank = size * size // 2
+	result = np.empty_like(img)
+
+	def add(row, count):
+		fine[columns, row] += count
+		coarse[columns, row >> 4] += count
+
+	for row in padded[:size - 1]:
+		add(row, 1)
+	for i in range(height):
+		add(padded[i + size - 1], 1)
+		kernel = _window_sum(coarse, size)
+		below = np.cumsum(kernel, axis=1)
+		bins = np.argmax(below > rank, axis=1)
+		# Rank of the median within its coarse bin
+		wanted = rank - below[pixels, bins] + kernel[pixels, bins]
+		for b in np.unique(bins):
+			selected = np.flatnonzero(bins == b)
+			lo, hi = selected[0], selected[-1] + size
+			block = _window_sum(fine[lo:hi, b * 16:b * 16 + 16], size)[selected - lo]
+			offset = np.argmax(np.cumsum(block, axis=1) > wanted[selected, None], axis=1)
+			result[i, selected] = b * 16 + offset
+		add(padded[i], -1)
+	return result
+
+
+def histogram(img):
+	return np.bincount(img.ravel(), minlength=256)
+
+
+def otsu_threshold(hist):
+	# Largest between-class variance over all splits, from cumulative sums.
+	# Pixels <= threshold are background.
+	hist = np.asarray(hist, dtype=np.float64)
+	weight_background = np.cumsum(hist)
+	sum_background = np.cumsum(hist * np.arange(len(hist)))
+	weight_foreground = weight_background[-1] - weight_background
+	valid = (weight_background > 0) & (weight_foreground > 0)
+	if not valid.any():
+		return 0
+	with np.errstate(divide='ignore', invalid='ignore'):
+		mean_background = sum_background / weight_background
+		mean_foreground = (sum_background[-1] - sum_background) / weight_foreground
+	variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+	return int(np.argmax(np.where(valid, variance, -1)))
+
+
+def multi_otsu_thresholds(hist, count=2):
+	# count thresholds splitting the histogram into count + 1 classes with
+	# the largest between-class variance. The class over bins [a, b) adds
+	# S(a, b)^2 / W(a, b) to the score, and dynamic programming over the
+	# class boundaries finds the best split in O(count * bins^2).
+	if count < 1:
+		raise ValueError(f"Need at least one threshold, got {count}")
+	if count == 1:
+		return [otsu_threshold(hist)]
+	hist = np.asarray(hist, dtype=np.float64)
+	bins = len(hist)
+	weights = np.concatenate(([0.0], np.cumsum(hist)))
+	sums = np.concatenate(([0.0], np.cumsum(hist * np.arange(bins))))
+	with np.errstate(divide='ignore', invalid='ignore'):
+		weight = weights[None, :] - weights[:, None]
+		score = (sums[None, :] - sums[:, None]) ** 2 / weight
+	score[weight <= 0] = 0
+	# score[a, b] for a < b only
+	score[np.tril_indices(bins + 1)] = -np.inf
+
+	best = score[0]
+	choices = []
+	for _ in range(count):
+		candidates = best[:, None] + score
+		choices.append(np.argmax(candidates, axis=0))
+		best = candidates.max(axis=0)
+	boundaries = []
+	boundary = bins
+	for choice in reversed(choices):
+		boundary = int(choice[boundary])
+		boundaries.append(boundary)
+	# A class ending before bin b means threshold b - 1
+	return [boundary - 1 for boundary in reversed(boundaries)]
+
+
+def apply_thresholds(img, thresholds):
+	# Classes evenly spread over 0..255, via a lookup table
+	levels = np.digitize(np.arange(256), thresholds, right=True)
+	lut = (levels * 255 // len(thresholds)).astype(np.uint8)
+	return lut[img]
+
+
+# Separable gradient operators as (smoothing, derivative) 3-tap kernels
+GRADIENT_OPERATORS = {
+	"sobel": ((1.0, 2.0, 1.0), (-1.0, 0.0, 1.0)),
+	"scharr": ((3.0, 10.0, 3.0), (-1.0, 0.0, 1.0)),
+}
+
+
+def _taps(padded, kernel, axis, length):
+	# Correlation with a short kernel along one axis of an already padded
+	# array, as a sum of shifted slices
+	result = None
+	for offset, weight in enumerate(kernel):
+		if weight == 0:
+			continue
+		part = padded[offset:offset + length] if axis == 0 else padded[:, offset:offset + length]
+		term = part * np.float32(weight)
+		result = term if result is None else np.add(result, term, out=result)
+	return result
+
+
+def gradients(img, operator="sobel", border="reflect"):
+	# (gx, gy) in float32: gx along columns (left to right), gy along rows
+	# (top to bottom). Each is a 3-tap smoothing pass and a 3-tap difference
+	# pass on shifted slices, so no intermediate ever overflows uint8.
+	if operator not in GRADIENT_OPERATORS:
+		raise ValueError(f"Unknown gradient operator: {operator}")
+	smooth, derivative = GRADIENT_OPERATORS[operator]
+	height, width = img.shape
+	padded = np.pad(img.astype(np.float32, copy=False), 1, mode=border)
+	rows = _taps(padded, smooth, 0, height)
+	columns = _taps(padded, smooth, 1, width)
+	gx = _taps(rows, derivative, 1, width)
+	gy = _taps(columns, derivative, 0, height)
+	return gx, gy
+
+
+def gradient_magnitude(img, operator="sobel", border="reflect"):
+	gx, gy = gradients(img, operator, border)
+	return np.hypot(gx, gy)
+
+
+def gaussian_blur(img, sigma, border="reflect"):
+	# Separable Gaussian in float32, kernel truncated at 3 sigma
+	img = img.astype(np.float32, copy=False)
+	if sigma <= 0:
+		return img
+	radius = max(1, int(np.ceil(3 * sigma)))
+	x = np.arange(-radius, radius + 1, dtype=np.float64)
+	kernel = np.exp(-x * x / (2 * sigma * sigma))
+	kernel /= kernel.sum()
+	height, width = img.shape
+	rows = _taps(np.pad(img, ((radius, radius), (0, 0)), mode=border), kernel, 0, height)
+	return _taps(np.pad(rows, ((0, 0), (radius, radius)), mode=border), kernel, 1, width)
+
+
+def non_maximum_suppression(magnitude, direction):
+	# Keeps pixels at least as strong as both neighbours across the edge.
+	# direction is quantized to 0, 45, 90 and 135 degrees (y points down).
+	height, width = magnitude.shape
+	padded = np.pad(magnitude, 1)
+	sector = np.round(direction * np.float32(4 / np.pi)).astype(np.int8) % 4
+	# (row, column) offset of one neighbour per sector; the other is opposite
+	offsets = ((0, 1), (1, 1), (1, 0), (1, -1))
+	keep = np.zeros(magnitude.shape, dtype=bool)
+	for index, (dy, dx) in enumerate(offsets):
+		forward = padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+		backward = padded[1 - dy:1 - dy + height, 1 - dx:1 - dx + width]
+		keep |= (sector == index) & (magnitude >= forward) & (magnitude >= backward)
+	return np.where(keep, magnitude, np.float32(0))
+
+
+def hysteresis(weak, strong):
+	# Weak pixels 8-connected to a strong one, via a vectorized union-find:
+	# every round hooks the larger root of each linked pair onto the smaller
+	# one, then path compression by pointer jumping flattens the trees.
+	height, width = weak.shape
+	index = np.full(weak.shape, -1, dtype=np.int64)
+	points = np.flatnonzero(weak)
+	index.ravel()[points] = np.arange(len(points))
+
+	pairs_a = []
+	pairs_b = []
+	for dy, dx in ((0, 1), (1, 0), (1, 1), (1, -1)):
+		left, right = max(0, -dx), width - max(0, dx)
+		a = index[:height - dy, left:right]
+		b = index[dy:, left + dx:right + dx]
+		linked = (a >= 0) & (b >= 0)
+		pairs_a.append(a[linked])
+		pairs_b.append(b[linked])
+	pairs_a = np.concatenate(pairs_a)
+	pairs_b = np.concatenate(pairs_b)
+
+	parent = np.arange(len(points))
+	while True:
+		roots_a = parent[pairs_a]
+		roots_b = parent[pairs_b]
+		differ = roots_a != roots_b
+		if not differ.any():
+			break
+		roots_a = roots_a[differ]
+		roots_b = roots_b[differ]
+		np.minimum.at(parent, np.maximum(roots_a, roots_b), np.minimum(roots_a, roots_b))
+		while True:
+			grandparent = parent[parent]
+			if (grandparent == parent).all():
+				break
+			parent = grandparent
+
+	connected = np.zeros(len(points), dtype=bool)
+	connected[parent[index.ravel()[np.flatnonzero(strong & weak)]]] = True
+	edges = np.zeros(weak.shape, dtype=bool)
+	edges.ravel()[points] = connected[parent]
+	return edges
+
+
+def canny(img, sigma=1.4, low=0.1, high=0.2, operator="sobel"):
+	# Canny edge detector. low and high are hysteresis thresholds as
+	# fractions of the strongest gradient. Returns (edges, magnitude,
+	# direction): a bool edge map, and the blurred image's gradient magnitude
+	# and direction in radians, for reuse by later stages.
+	if not 0 <= low <= high:
+		raise ValueError(f"Canny thresholds must satisfy 0 <= low <= high, got {low}, {high}")
+	gx, gy = gradients(gaussian_blur(img, sigma), operator)
+	magnitude = np.hypot(gx, gy)
+	direction = np.arctan2(gy, gx)
+	thin = non_maximum_suppression(magnitude, direction)
+	peak = thin.max()
+	if peak == 0:
+		return np.zeros(img.shape, dtype=bool), magnitude, direction
+	weak = thin >= np.float32(low * peak)
+	weak &= thin > 0
+	strong = thin >= np.float32(high * peak)
+	return hysteresis(weak, strong), magnitude, direction
+
+
+# Default k for each adaptive threshold method; "mean" ignores it
+ADAPTIVE_METHODS = {"mean": 0.0, "niblack": -0.2, "sauvola": 0.34}
+# Dynamic range of the standard deviation in Sauvola's formula
+SAUVOLA_RANGE = 128.0
+
+
+def integral_image(img, squared=False):
+	# Summed-area table with a zero first row and column: table[y, x] is the
+	# sum of img[:y, :x]. int64 keeps sums of squares exact on huge images.
+	values = img.astype(np.int64)
+	if squared:
+		values *= values
+	table = np.zeros((img.shape[0] + 1, img.shape[1] + 1), dtype=np.int64)
+	np.cumsum(np.cumsum(values, axis=0), axis=1, out=table[1:, 1:])
+	return table
+
+
+def window_sums(table, window):
+	# (sums, counts) of every window x window neighbourhood, clipped at the
+	# borders as the original loop did, in four lookups per pixel
+	height, width = table.shape[0] - 1, table.shape[1] - 1
+	radius = window // 2
+	top = np.clip(np.arange(height) - radius, 0, height)
+	bottom = np.clip(np.arange(height) + radius + 1, 0, height)
+	left = np.clip(np.arange(width) - radius, 0, width)
+	right = np.clip(np.arange(width) + radius + 1, 0, width)
+	rows = table[bottom] - table[top]
+	sums = rows[:, right] - rows[:, left]
+	counts = (bottom - top)[:, None] * (right - left)[None, :]
+	return sums, counts
+
+
+def adaptive_threshold(img, window=15, c=2, method="mean", k=None):
+	# White where the pixel is above its local threshold minus c:
+	#   mean     T = m
+	#   niblack  T = m + k * s
+	#   sauvola  T = m * (1 + k * (s / R - 1))
+	# m and s are the window mean and standard deviation, both from
+	# summed-area tables, so the cost per pixel does not depend on window.
+	if method not in ADAPTIVE_METHODS:
+		raise ValueError(f"Unknown adaptive threshold method: {method}")
+	if window < 1 or window % 2 == 0:
+		raise ValueError(f"Window size must be a positive odd number, got {window}")
+	if k is None:
+		k = ADAPTIVE_METHODS[method]
+	sums, counts = window_sums(integral_image(img), window)
+	mean = sums / counts
+	if method == "mean":
+		threshold = mean
+	else:
+		squares, _ = window_sums(integral_image(img, squared=True), window)
+		std = np.sqrt(np.maximum(squares / counts - mean * mean, 0))
+		if method == "niblack":
+			threshold = mean + k * std
+		else:
+			threshold = mean * (1 + k * (std / SAUVOLA_RANGE - 1))
+	return np.where(img > threshold - c, np.uint8(255), np.uint8(0))
@@ -1,7 +1,9 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import numpy as np
+import filters
+import pipeline
 
 class ImageProcessor:
 	def __init__(self):
@@ -11,6 +13,10 @@ class ImageProcessor:
 		# Initialize variables
 		self.original_image = None
 		self.processed_image = None
+		# Steps that produced processed_image, and memoized intermediate results
+		self.steps = []
+		self.cache = pipeline.ResultCache()
+		self.image_key = None
 		self.setup_gui()
 
 	def setup_gui(self):
@@ -19,9 +25,48 @@ class ImageProcessor:
 		tk.Button(self.window, text="Apply Median Filter", command=self.apply_median_filter).pack(pady=5)
 		tk.Button(self.window, text="Apply Histogram Thresholding", command=self.apply_histogram_threshold).pack(pady=5)
 		tk.Button(self.window, text="Apply Gradient Thresholding", command=self.apply_gradient_threshold).pack(pady=5)
+		tk.Button(self.window, text="Apply Canny Edge Detection", command=self.apply_canny).pack(pady=5)
 		tk.Button(self.window, text="Apply Adaptive Thresholding", command=self.apply_adaptive_threshold).pack(pady=5)
 		tk.Button(self.window, text="Save Result", command=self.save_image).pack(pady=5)
 
+		# Filter chain, e.g. "median:size=5 | adaptive:window=31"
+		pipeline_frame = tk.Frame(self.window)
+		pipeline_frame.pack(pady=5)
+		self.chain_var = tk.BooleanVar(value=False)
+		tk.Checkbutton(pipeline_frame, text="Chain", variable=self.chain_var).pack(side=tk.LEFT)
+		self.pipeline_entry = tk.Entry(pipeline_frame, width=50)
+		self.pipeline_entry.pack(side=tk.LEFT, padx=5)
+		self.pipeline_entry.bind("<Return>", lambda event: self.apply_pipeline())
+		tk.Button(pipeline_frame, text="Apply Pipeline", command=self.apply_pipeline).pack(side=tk.LEFT)
+
+		# Filter parameters
+		params_frame = tk.Frame(self.window)
+		params_frame.pack(pady=5)
+		tk.Label(params_frame, text="Median size:").pack(side=tk.LEFT)
+		self.median_size = tk.Spinbox(params_frame, from_=3, to=99, increment=2, width=4)
+		self.median_size.pack(side=tk.LEFT, padx=5)
+		tk.Label(params_frame, text="Otsu thresholds:").pack(side=tk.LEFT)
+		self.otsu_levels = tk.Spinbox(params_frame, from_=1, to=4, width=3)
+		self.otsu_levels.pack(side=tk.LEFT, padx=5)
+		tk.Label(params_frame, text="Gradient:").pack(side=tk.LEFT)
+		self.gradient_operator = tk.StringVar(value="sobel")
+		tk.OptionMenu(params_frame, self.gradient_operator, *filters.GRADIENT_OPERATORS).pack(side=tk.LEFT, padx=5)
+
+		adaptive_frame = tk.Frame(self.window)
+		adaptive_frame.pack(pady=5)
+		tk.Label(adaptive_frame, text="Adaptive:").pack(side=tk.LEFT)
+		self.adaptive_method = tk.StringVar(value="mean")
+		tk.OptionMenu(adaptive_frame, self.adaptive_method, *filters.ADAPTIVE_METHODS).pack(side=tk.LEFT, padx=5)
+		tk.Label(adaptive_frame, text="Window:").pack(side=tk.LEFT)
+		self.adaptive_window = tk.Spinbox(adaptive_frame, from_=3, to=501, increment=2, width=4)
+		self.adaptive_window.delete(0, tk.END)
+		self.adaptive_window.insert(0, "15")
+		self.adaptive_window.pack(side=tk.LEFT, padx=5)
+		tk.Label(adaptive_frame, text="C:").pack(side=tk.LEFT)
+		self.adaptive_c = tk.Entry(adaptive_frame, width=5)
+		self.adaptive_c.insert(0, "2")
+		self.adaptive_c.pack(side=tk.LEFT, padx=5)
+
 		# Image display labels
 		self.original_label = tk.Label(self.window)
 		self.original_label.pack(side=tk.LEFT, padx=10)
@@ -32,6 +77,8 @@ class ImageProcessor:
 		file_path = filedialog.askopenfilename()
 		if file_path:
 			self.original_image = Image.open(file_path).convert('L')
+			self.image_key = pipeline.image_key(np.array(self.original_image))
+			self.steps = []
 
 		# Convert to grayscale
 		self.display_images()
@@ -55,111 +102,70 @@ class ImageProcessor:
 			if file_path:
 				self.processed_image.save(file_path)
 
-	def apply_median_filter(self):
+	def apply_steps(self, steps):
+		# Runs steps on the original image; earlier results come from the cache
+		img_array = np.array(self.original_image)
+		result = pipeline.run(img_array, steps, self.cache, self.image_key)
+		self.steps = steps
+		self.pipeline_entry.delete(0, tk.END)
+		self.pipeline_entry.insert(0, " | ".join(
+			name + (":" + ",".join(f"{key}={value}" for key, value in params.items()) if params else "")
+			for name, params in steps))
+		self.processed_image = Image.fromarray(result)
+		self.display_images()
+
+	def apply_step(self, name, params, error):
+		# With Chain checked the step is added after the current ones
 		if self.original_image:
-			# Convert image to numpy array
-			img_array = np.array(self.original_image)
-			height, width = img_array.shape
-			result = np.zeros((height, width), dtype=np.uint8)
-
-			# Apply 3x3 median filter
-			for i in range(1, height-1):
-				for j in range(1, width-1):
-					neighborhood = []
-					for k in range(-1, 2):
-						for l in range(-1, 2):
-							neighborhood.append(img_array[i+k, j+l])
-					neighborhood.sort()
-					result[i, j] = neighborhood[4]
-					# Median of 9 values
-			self.processed_image = Image.fromarray(result)
-			self.display_images()
+			try:
+				new_step = pipeline.step(name, params)
+				self.apply_steps(self.steps + [new_step] if self.chain_var.get() else [new_step])
+			except ValueError as e:
+				messagebox.showerror("Error", f"{error}: {str(e)}")
 
-	def apply_histogram_threshold(self):
+	def apply_pipeline(self):
 		if self.original_image:
-			img_array = np.array(self.original_image)
-			# Calculate histogram
-			histogram = [0] * 256
-			for pixel in img_array.flatten():
-				histogram[pixel] += 1
-			# Find threshold using Otsu's method
-			total_pixels = img_array.size
-			sum_all = sum(i * h for i, h in enumerate(histogram))
-			sum_background = 0
-			weight_background = 0
-			max_variance = 0
-			threshold = 0
-			for t in range(256):
-				weight_background += histogram[t]
-				if weight_background == 0:
-					continue
-				weight_foreground = total_pixels - weight_background
-				if weight_foreground == 0:
-					break
-				sum_background += t * histogram[t]
-				mean_background = sum_background / weight_background
-				mean_foreground = (sum_all - sum_background) / weight_foreground
-				variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
-				if variance > max_variance:
-					max_variance = variance
-					threshold = t
-
-			# Apply threshold
-			result = (img_array > threshold) * 255
-			self.processed_image = Image.fromarray(result.astype(np.uint8))
-			self.display_images()
+			try:
+				self.apply_steps(pipeline.parse(self.pipeline_entry.get()))
+			except ValueError as e:
+				messagebox.showerror("Error", f"Invalid pipeline: {str(e)}")
+
+	def apply_median_filter(self):
+		# Small kernels sort windows, large ones use running histograms
+		try:
+			size = int(self.median_size.get())
+		except ValueError as e:
+			messagebox.showerror("Error", f"Invalid median size: {str(e)}")
+			return
+		self.apply_step("median", {"size": size}, "Invalid median size")
+
+	def apply_histogram_threshold(self):
+		# Otsu's method; more than one threshold gives multi-level Otsu.
+		# The histogram is cached, so changing the count does not rescan.
+		try:
+			levels = int(self.otsu_levels.get())
+		except ValueError as e:
+			messagebox.showerror("Error", f"Invalid number of thresholds: {str(e)}")
+			return
+		self.apply_step("otsu", {"levels": levels}, "Invalid number of thresholds")
 
 	def apply_gradient_threshold(self):
-		if self.original_image:
-			img_array = np.array(self.original_image)
-			height, width = img_array.shape
-			result = np.zeros((height, width), dtype=np.uint8)
-
-			# Calculate gradient magnitude using Sobel operators
-			gradient_x = np.zeros((height, width))
-			gradient_y = np.zeros((height, width))
-			for i in range(1, height-1):
-				for j in range(1, width-1):
-					# Sobel x-direction
-					gradient_x[i, j] = (img_array[i+1, j-1] + 2*img_array[i+1, j] + img_array[i+1, j+1]) - (img_array[i-1, j-1] + 2*img_array[i-1, j] + img_array[i-1, j+1])
-
-					# Sobel y-direction
-					gradient_y[i, j] = (img_array[i-1, j+1] + 2*img_array[i, j+1] + img_array[i+1, j+1]) - (img_array[i-1, j-1] + 2*img_array[i, j-1] + img_array[i+1, j-1])
-			gradient_magnitude = np.sqrt(gradient_x**2 + gradient_y**2)
-
-			# Threshold gradient magnitude
-			threshold = np.mean(gradient_magnitude) * 1.5
-			result = (gradient_magnitude > threshold) * 255
-			self.processed_image = Image.fromarray(result.astype(np.uint8))
-			self.display_images()
+		# Gradient magnitude using Sobel or Scharr operators, thresholded at 1.5x its mean
+		self.apply_step("gradient", {"operator": self.gradient_operator.get()}, "Gradient thresholding failed")
+
+	def apply_canny(self):
+		self.apply_step("canny", {"operator": self.gradient_operator.get()}, "Canny edge detection failed")
 
 	def apply_adaptive_threshold(self):
-		if self.original_image:
-			img_array = np.array(self.original_image)
-			height, width = img_array.shape
-			result = np.zeros((height, width), dtype=np.uint8)
-			window_size = 15
-			c = 2
-
-			# Constant subtracted from mean
-			for i in range(height):
-				for j in range(width):
-
-					# Define local window boundaries
-					y_start = max(0, i - window_size//2)
-					y_end = min(height, i + window_size//2 + 1)
-					x_start = max(0, j - window_size//2)
-					x_end = min(width, j + window_size//2 + 1)
-
-					# Calculate local mean
-					window = img_array[y_start:y_end, x_start:x_end]
-					local_mean = np.mean(window)
-
-					# Apply threshold
-					if img_array[i, j] > local_mean - c:
-						result[i, j] = 255 
-			self.processed_image = Image.fromarray(result)
-			self.display_images()
+		try:
+			window_size = int(self.adaptive_window.get())
+			# Constant subtracted from the local threshold
+			c = float(self.adaptive_c.get())
+		except ValueError as e:
+			messagebox.showerror("Error", f"Invalid adaptive threshold parameters: {str(e)}")
+			return
+		self.apply_step("adaptive", {"window": window_size, "c": c, "method": self.adaptive_method.get()},
+		                "Invalid adaptive threshold parameters")
 
 	def run(self):
 		self.window.mainloop()
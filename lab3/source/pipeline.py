@@ -0,0 +1,197 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import filters
+
+# Chains of lab3 filters, e.g. "median:size=5 | adaptive:window=31,method=sauvola".
+# Every intermediate result is memoized in a size-bounded LRU under a key
+# chained from the input's hash, so re-running a chain with only the last
+# step changed reuses everything before it without rehashing any pixels.
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def _median(img, size):
+	return filters.median_filter(img, size)
+
+
+def _otsu(img, levels, histogram):
+	return filters.apply_thresholds(img, filters.multi_otsu_thresholds(histogram, levels))
+
+
+def _gradient(img, operator, factor):
+	magnitude = filters.gradient_magnitude(img, operator)
+	return np.where(magnitude > np.mean(magnitude) * factor, np.uint8(255), np.uint8(0))
+
+
+def _canny(img, sigma, low, high, operator):
+	edges, _, _ = filters.canny(img, sigma, low, high, operator)
+	return edges.astype(np.uint8) * 255
+
+
+def _adaptive(img, window, c, method):
+	return filters.adaptive_threshold(img, window, c, method)
+
+
+# name -> (function, default parameters); every step maps uint8 to uint8
+STEPS = {
+	"median": (_median, {"size": 3}),
+	"otsu": (_otsu, {"levels": 1}),
+	"gradient": (_gradient, {"operator": "sobel", "factor": 1.5}),
+	"canny": (_canny, {"sigma": 1.4, "low": 0.1, "high": 0.2, "operator": "sobel"}),
+	"adaptive": (_adaptive, {"window": 15, "c": 2.0, "method": "mean"}),
+}
+
+
+def _value(text):
+	for convert in (int, float):
+		try:
+			return convert(text)
+		except ValueError:
+			pass
+	return text
+
+
+def parse(text):
+	# "median:size=5 | otsu" -> [("median", {"size": 5}), ("otsu", {})]
+	steps = []
+	for part in text.replace("->", "|").split("|"):
+		part = part.strip()
+		if not part:
+			continue
+		name, _, arguments = part.partition(":")
+		params = {}
+		for argument in filter(None, (a.strip() for a in arguments.split(","))):
+			key, sep, value = argument.partition("=")
+			if not sep:
+				raise ValueError(f"Expected key=value, got: {argument}")
+			params[key.strip()] = _value(value.strip())
+		steps.append((name.strip(), params))
+	if not steps:
+		raise ValueError("Empty pipeline")
+	return [step(name, params) for name, params in steps]
+
+
+def _coerce(name, key, value, default):
+	# value as the type of the default; ints must be whole numbers
+	try:
+		if isinstance(default, int):
+			if isinstance(value, float) and not value.is_integer():
+				raise ValueError
+			return int(value)
+		return type(default)(value)
+	except (TypeError, ValueError, OverflowError):
+		kind = type(default).__name__
+		raise ValueError(f"Invalid value for {name} {key}: {value!r} (expected {kind})") from None
+
+
+def step(name, params=None):
+	# (name, parameters with defaults filled in), checked against STEPS
+	if name not in STEPS:
+		raise ValueError(f"Unknown filter: {name}, choose from: {', '.join(STEPS)}")
+	defaults = STEPS[name][1]
+	unknown = set(params or {}) - set(defaults)
+	if unknown:
+		raise ValueError(f"Unknown parameters for {name}: {', '.join(sorted(unknown))}")
+	params = {key: _coerce(name, key, value, defaults[key]) for key, value in (params or {}).items()}
+	return name, {**defaults, **params}
+
+
+def image_key(img):
+	digest = hashlib.blake2b(digest_size=16)
+	digest.update(f"{img.dtype}{img.shape}".encode())
+	digest.update(np.ascontiguousarray(img).data)
+	return digest.hexdigest()
+
+
+def chain_key(key, name, params):
+	# Key of a step's output: depends on its input's key, not its pixels
+	return hashlib.blake2b(repr((key, name, sorted(params.items()))).encode(), digest_size=16).hexdigest()
+
+
+class ResultCache:
+	def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+		self.max_bytes = max_bytes
+		self.entries = OrderedDict()  # key -> array, oldest first
+		self.bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get(self, key):
+		value = self.entries.get(key)
+		if value is None:
+			self.misses += 1
+			return None
+		self.entries.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def put(self, key, value):
+		if value.nbytes > self.max_bytes:
+			return
+		# Cached arrays are shared between runs, so they must not change
+		value.flags.writeable = False
+		if key in self.entries:
+			self.bytes -= self.entries.pop(key).nbytes
+		self.entries[key] = value
+		self.bytes += value.nbytes
+		while self.bytes > self.max_bytes:
+			_, evicted = self.entries.popitem(last=False)
+			self.bytes -= evicted.nbytes
+			self.evictions += 1
+
+	def clear(self):
+		self.entries.clear()
+		self.bytes = 0
+
+	def stats(self):
+		return {
+			"entries": len(self.entries),
+			"bytes": self.bytes,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+		}
+
+
+def histogram(img, key, cache=None):
+	# Histogram of an image, memoized under its key
+	if cache is None:
+		return filters.histogram(img)
+	hist_key = chain_key(key, "histogram", {})
+	hist = cache.get(hist_key)
+	if hist is None:
+		hist = filters.histogram(img)
+		cache.put(hist_key, hist)
+	return hist
+
+
+def run(img, steps, cache=None, key=None):
+	# Applies steps in order. With a cache, key identifies img (image_key(img)
+	# when not given) and only the steps after the last cached one are
+	# computed; without one nothing is hashed.
+	keys = [None] * (len(steps) + 1)
+	start = 0
+	result = img
+	if cache is not None:
+		keys[0] = key or image_key(img)
+		for index, (name, params) in enumerate(steps):
+			keys[index + 1] = chain_key(keys[index], name, params)
+		for index in range(len(steps), 0, -1):
+			cached = cache.get(keys[index])
+			if cached is not None:
+				start, result = index, cached
+				break
+
+	for index in range(start, len(steps)):
+		name, params = steps[index]
+		function = STEPS[name][0]
+		if name == "otsu":
+			# The input's histogram is shared by every number of thresholds
+			result = function(result, histogram=histogram(result, keys[index], cache), **params)
+		else:
+			result = function(result, **params)
+		if cache is not None:
+			cache.put(keys[index + 1], result)
+	return result
@@ -0,0 +1,183 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+import filters
+
+# Tiled execution of the lab3 filters for images too large to hold in memory
+# several times over. Input and output are .npy files opened as memory maps;
+# each tile is read with a halo wide enough for the filter's neighbourhood,
+# filtered, and only its core written back, so the result matches filtering
+# the whole image at once. Tiles run in a process pool; workers map the
+# files themselves, so no pixel data is pickled. Filters that need global
+# statistics (Otsu's histogram, the mean gradient) take two passes: the
+# first reduces per-tile statistics, the second applies the result.
+#
+#   python tiles.py slide.npy result.npy --op median --size 5 --workers 8
+
+DEFAULT_TILE = 1024
+
+# halo(params): margin the filter reads around each pixel
+# measure(tile, core, params): per-tile statistic for the first pass, or None
+# combine(partials, pixels, params): global statistic from the partials
+# apply(tile, params, stats): the filtered tile
+TiledOp = namedtuple("TiledOp", "halo measure combine apply")
+
+
+def _gradient_sum(tile, core, params):
+	return float(filters.gradient_magnitude(tile, params.get("operator", "sobel"))[core].sum(dtype=np.float64))
+
+
+def _gradient_apply(tile, params, mean):
+	magnitude = filters.gradient_magnitude(tile, params.get("operator", "sobel"))
+	return np.where(magnitude > mean * 1.5, np.uint8(255), np.uint8(0))
+
+
+OPS = {
+	"median": TiledOp(
+		halo=lambda params: params.get("size", 3) // 2,
+		measure=None,
+		combine=None,
+		apply=lambda tile, params, stats: filters.median_filter(tile, params.get("size", 3)),
+	),
+	"otsu": TiledOp(
+		halo=lambda params: 0,
+		measure=lambda tile, core, params: filters.histogram(tile[core]),
+		combine=lambda partials, pixels, params: filters.multi_otsu_thresholds(
+			np.sum(partials, axis=0), params.get("levels", 1)),
+		apply=lambda tile, params, thresholds: filters.apply_thresholds(tile, thresholds),
+	),
+	"gradient": TiledOp(
+		halo=lambda params: 1,
+		measure=_gradient_sum,
+		combine=lambda partials, pixels, params: sum(partials) / max(pixels, 1),
+		apply=_gradient_apply,
+	),
+	"adaptive": TiledOp(
+		halo=lambda params: params.get("window", 15) // 2,
+		measure=None,
+		combine=None,
+		apply=lambda tile, params, stats: filters.adaptive_threshold(
+			tile, params.get("window", 15), params.get("c", 2), params.get("method", "mean")),
+	),
+}
+
+# Memory maps of the current job, opened once per worker process
+_arrays = {}
+
+
+def _open(source, target):
+	_arrays["source"] = np.load(source, mmap_mode="r")
+	_arrays["target"] = np.load(target, mmap_mode="r+") if target else None
+
+
+def _read(box, halo):
+	# Tile with halo, clipped at the image edges, and the slices of its core
+	source = _arrays["source"]
+	height, width = source.shape
+	top, bottom, left, right = box
+	y0, y1 = max(top - halo, 0), min(bottom + halo, height)
+	x0, x1 = max(left - halo, 0), min(right + halo, width)
+	core = (slice(top - y0, bottom - y0), slice(left - x0, right - x0))
+	return np.asarray(source[y0:y1, x0:x1]), core
+
+
+def _measure_tile(op, params, box):
+	spec = OPS[op]
+	tile, core = _read(box, spec.halo(params))
+	return spec.measure(tile, core, params)
+
+
+def _apply_tile(op, params, stats, box):
+	spec = OPS[op]
+	tile, core = _read(box, spec.halo(params))
+	top, bottom, left, right = box
+	_arrays["target"][top:bottom, left:right] = spec.apply(tile, params, stats)[core]
+
+
+def tile_boxes(shape, tile=DEFAULT_TILE):
+	height, width = shape
+	return [(top, min(top + tile, height), left, min(left + tile, width))
+	        for top in range(0, height, tile) for left in range(0, width, tile)]
+
+
+def run_tiled(source, target, op, params=None, tile=DEFAULT_TILE, workers=None):
+	# Filters the uint8 .npy image at source into a new .npy at target
+	if op not in OPS:
+		raise ValueError(f"Filter {op} cannot run tiled, choose from: {', '.join(OPS)}")
+	params = params or {}
+	spec = OPS[op]
+	image = np.load(source, mmap_mode="r")
+	if image.ndim != 2 or image.dtype != np.uint8:
+		raise ValueError(f"Expected a 2-D uint8 image, got {image.ndim}-D {image.dtype}")
+	output = np.lib.format.open_memmap(target, mode="w+", dtype=np.uint8, shape=image.shape)
+	del output
+	boxes = tile_boxes(image.shape, tile)
+	workers = workers or os.cpu_count() or 1
+
+	if workers == 1:
+		# In-process, for small jobs and debugging
+		_open(source, target)
+		try:
+			stats = None
+			if spec.measure:
+				partials = [_measure_tile(op, params, box) for box in boxes]
+				stats = spec.combine(partials, image.size, params)
+			for box in boxes:
+				_apply_tile(op, params, stats, box)
+			_arrays["target"].flush()
+		finally:
+			_arrays.clear()
+		return
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=_open, initargs=(source, target)) as pool:
+		stats = None
+		if spec.measure:
+			partials = list(pool.map(_measure_tile, *zip(*[(op, params, box) for box in boxes])))
+			stats = spec.combine(partials, image.size, params)
+		for _ in pool.map(_apply_tile, *zip(*[(op, params, stats, box) for box in boxes])):
+			pass
+
+
+def to_npy(path, folder):
+	# .npy inputs are used in place; other formats are decoded once with PIL
+	# (which needs the whole image in memory) and written out as .npy
+	if path.lower().endswith(".npy"):
+		return path
+	Image.MAX_IMAGE_PIXELS = None
+	target = os.path.join(folder, "input.npy")
+	np.save(target, np.asarray(Image.open(path).convert('L')))
+	return target
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Run a lab3 filter on a large image tile by tile")
+	parser.add_argument("input", help="grayscale .npy (memory-mapped) or any image PIL can open")
+	parser.add_argument("output", help=".npy output (memory-mapped) or an image file")
+	parser.add_argument("--op", choices=OPS, default="median")
+	parser.add_argument("--size", type=int, default=3, help="median kernel size")
+	parser.add_argument("--levels", type=int, default=1, help="Otsu thresholds")
+	parser.add_argument("--operator", choices=filters.GRADIENT_OPERATORS, default="sobel")
+	parser.add_argument("--window", type=int, default=15, help="adaptive threshold window")
+	parser.add_argument("--c", type=float, default=2)
+	parser.add_argument("--method", choices=filters.ADAPTIVE_METHODS, default="mean")
+	parser.add_argument("--tile", type=int, default=DEFAULT_TILE)
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	args = parser.parse_args()
+
+	params = {"size": args.size, "levels": args.levels, "operator": args.operator,
+	          "window": args.window, "c": args.c, "method": args.method}
+	start = time.perf_counter()
+	with tempfile.TemporaryDirectory() as scratch:
+		source = to_npy(args.input, scratch)
+		if args.output.lower().endswith(".npy"):
+			run_tiled(source, args.output, args.op, params, args.tile, args.workers)
+		else:
+			target = os.path.join(scratch, "output.npy")
+			run_tiled(source, target, args.op, params, args.tile, args.workers)
+			Image.fromarray(np.load(target)).save(args.output)
+	print(f"{args.op}: {time.perf_counter() - start:.2f} s")